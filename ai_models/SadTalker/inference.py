@@ -11,8 +11,29 @@ from src.facerender.animate import AnimateFromCoeff
 from src.generate_batch import get_data
 from src.generate_facerender_batch import get_facerender_data
 from src.utils.init_path import init_path
+from src.utils.progress import JobProgress
+from src.utils.compositor import Compositor
 
 def main(args):
+    progress = None
+    if args.progress_file is not None:
+        stages = ['mel', 'audio2exp', 'face_renderer']
+        if 'full' in args.preprocess.lower():
+            stages.append('seamless_clone')
+        if args.enhancer:
+            stages.append('face_enhancer')
+        progress = JobProgress(args.progress_file, stages)
+
+    try:
+        run(args, progress)
+    except BaseException as e:
+        # Any crash (not only missing coeffs) must leave the job as failed, not processing
+        if progress is not None and progress.state['status'] == 'processing':
+            progress.finish(error=str(e) or e.__class__.__name__)
+        raise
+
+
+def run(args, progress=None):
     #torch.backends.cudnn.enabled = False
 
     pic_path = args.source_image
@@ -47,6 +68,8 @@ def main(args):
                                                                              source_image_flag=True, pic_size=args.size)
     if first_coeff_path is None:
         print("Can't get the coeffs of the input")
+        if progress is not None:
+            progress.finish(error="Can't get the coeffs of the input")
         return
 
     if ref_eyeblink is not None:
@@ -71,8 +94,8 @@ def main(args):
         ref_pose_coeff_path=None
 
     #audio2ceoff
-    batch = get_data(first_coeff_path, audio_path, device, ref_eyeblink_coeff_path, still=args.still)
-    coeff_path = audio_to_coeff.generate(batch, save_dir, pose_style, ref_pose_coeff_path)
+    batch = get_data(first_coeff_path, audio_path, device, ref_eyeblink_coeff_path, still=args.still, progress_callback=progress)
+    coeff_path = audio_to_coeff.generate(batch, save_dir, pose_style, ref_pose_coeff_path, progress_callback=progress)
 
     # 3dface render
     if args.face3dvis:
@@ -84,11 +107,19 @@ def main(args):
                                 batch_size, input_yaw_list, input_pitch_list, input_roll_list,
                                 expression_scale=args.expression_scale, still_mode=args.still, preprocess=args.preprocess, size=args.size)
     
+    compositor = None
+    if args.composite_with is not None:
+        compositor = Compositor(args.composite_with, os.path.join(save_dir, 'composited.mp4'), layout=args.composite_layout,
+                                height=args.composite_height, preset=args.composite_preset, threads=args.composite_threads)
+
     result = animate_from_coeff.generate(data, save_dir, pic_path, crop_info, \
-                                enhancer=args.enhancer, background_enhancer=args.background_enhancer, preprocess=args.preprocess, img_size=args.size)
+                                enhancer=args.enhancer, background_enhancer=args.background_enhancer, preprocess=args.preprocess, img_size=args.size, \
+                                progress_callback=progress, hls_dir=args.hls_dir, compositor=compositor)
     
     shutil.move(result, save_dir+'.mp4')
     print('The generated video is named:', save_dir+'.mp4')
+    if progress is not None:
+        progress.finish(video_path=save_dir+'.mp4')
 
     if not args.verbose:
         shutil.rmtree(save_dir)
@@ -118,6 +149,13 @@ if __name__ == '__main__':
     parser.add_argument("--preprocess", default='crop', choices=['crop', 'extcrop', 'resize', 'full', 'extfull'], help="how to preprocess the images" ) 
     parser.add_argument("--verbose",action="store_true", help="saving the intermedia output or not" ) 
     parser.add_argument("--old_version",action="store_true", help="use the pth other than safetensor version" ) 
+    parser.add_argument("--progress_file", default=None, help="json file the stage progress and eta of this job are written to" ) 
+    parser.add_argument("--composite_with", default=None, help="lesson video to composite the avatar with in the same encode" ) 
+    parser.add_argument("--composite_layout", default='side_by_side', choices=['side_by_side', 'pip'], help="how the avatar is placed next to the lesson video" ) 
+    parser.add_argument("--composite_height", type=int, default=720, help="output height of the composited video" ) 
+    parser.add_argument("--composite_preset", default='fast', help="x264 preset of the composited video" ) 
+    parser.add_argument("--composite_threads", type=int, default=0, help="encoder thread budget of the compositor, 0 lets ffmpeg decide" ) 
+    parser.add_argument("--hls_dir", default=None, help="also stream the rendered frames as an hls playlist into this directory while rendering" ) 
 
 
     # net structure and parameters
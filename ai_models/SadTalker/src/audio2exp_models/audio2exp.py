@@ -1,7 +1,8 @@
-from tqdm import tqdm
 import torch
 from torch import nn
 
+from src.utils.progress import track
+
 
 class Audio2Exp(nn.Module):
     def __init__(self, netG, cfg, device, prepare_training_loss=False):
@@ -10,7 +11,7 @@ class Audio2Exp(nn.Module):
         self.device = device
         self.netG = netG.to(device)
 
-    def test(self, batch):
+    def test(self, batch, progress_callback=None):
 
         mel_input = batch['indiv_mels']                         # bs T 1 80 16
         bs = mel_input.shape[0]
@@ -18,7 +19,7 @@ class Audio2Exp(nn.Module):
 
         exp_coeff_pred = []
 
-        for i in tqdm(range(0, T, 10),'audio2exp:'): # every 10 frames
+        for i in track(range(0, T, 10), 'audio2exp:', 'audio2exp', progress_callback, frames_total=T, step=10): # every 10 frames
             
             current_mel_input = mel_input[:,i:i+10]
 
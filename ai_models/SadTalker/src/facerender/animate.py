@@ -22,7 +22,8 @@ from src.facerender.modules.make_animation import make_animation
 from pydub import AudioSegment 
 from src.utils.face_enhancer import enhancer_generator_with_len, enhancer_list
 from src.utils.paste_pic import paste_pic
-from src.utils.videoio import save_video_with_watermark
+from src.utils.videoio import save_video_with_watermark, load_video_to_cv2
+from src.utils.hls_writer import HLSWriter
 
 try:
     import webui  # in webui
@@ -154,7 +155,7 @@ class AnimateFromCoeff():
 
         return checkpoint['epoch']
 
-    def generate(self, x, video_save_dir, pic_path, crop_info, enhancer=None, background_enhancer=None, preprocess='crop', img_size=256):
+    def generate(self, x, video_save_dir, pic_path, crop_info, enhancer=None, background_enhancer=None, preprocess='crop', img_size=256, progress_callback=None, hls_dir=None, compositor=None):
 
         source_image=x['source_image'].type(torch.FloatTensor)
         source_semantics=x['source_semantics'].type(torch.FloatTensor)
@@ -180,9 +181,55 @@ class AnimateFromCoeff():
 
         frame_num = x['frame_num']
 
-        predictions_video = make_animation(source_image, source_semantics, target_semantics,
-                                        self.generator, self.kp_extractor, self.he_estimator, self.mapping, 
-                                        yaw_c_seq, pitch_c_seq, roll_c_seq, use_exp = True)
+        audio_path =  x['audio_path'] 
+        audio_name = os.path.splitext(os.path.split(audio_path)[-1])[0]
+        new_audio_path = os.path.join(video_save_dir, audio_name+'.wav')
+        start_time = 0
+        # cog will not keep the .mp3 filename
+        sound = AudioSegment.from_file(audio_path)
+        frames = frame_num 
+        end_time = start_time + frames*1/25*1000
+        word1=sound.set_frame_rate(16000)
+        word = word1[start_time:end_time]
+        word.export(new_audio_path, format="wav")
+
+        ### the generated video is 256x256, so we keep the aspect ratio, 
+        original_size = crop_info[0]
+        if original_size:
+            out_size = (img_size, int(img_size * original_size[1]/original_size[0]))
+        else:
+            out_size = None
+
+        # progressive preview: stream the rendered frames as hls segments while rendering
+        hls_writer = None
+        frame_callback = None
+        if hls_dir is not None:
+            width, height = out_size if out_size else (img_size, img_size)
+            try:
+                hls_writer = HLSWriter(hls_dir, new_audio_path, width, height, frame_num)
+            except OSError as e:
+                # e.g. ffmpeg missing, the preview is optional
+                print('HLS preview not started: %s' % e)
+            sequence_len = target_semantics.shape[1]
+
+            def frame_callback(frame_idx, prediction):
+                if hls_writer is None or hls_writer.disabled:
+                    return
+                images = np.transpose(prediction.data.cpu().numpy(), [0, 2, 3, 1]).astype(np.float32)
+                for seq_idx, image in enumerate(images):
+                    image = img_as_ubyte(image)
+                    if out_size:
+                        image = cv2.resize(image, out_size)
+                    hls_writer.write(seq_idx * sequence_len + frame_idx, image)
+
+        try:
+            predictions_video = make_animation(source_image, source_semantics, target_semantics,
+                                            self.generator, self.kp_extractor, self.he_estimator, self.mapping, 
+                                            yaw_c_seq, pitch_c_seq, roll_c_seq, use_exp = True,
+                                            progress_callback=progress_callback, frame_callback=frame_callback)
+        finally:
+            if hls_writer is not None:
+                hls_writer.close()
 
         predictions_video = predictions_video.reshape((-1,)+predictions_video.shape[2:])
         predictions_video = predictions_video[:frame_num]
@@ -194,10 +241,8 @@ class AnimateFromCoeff():
             video.append(image)
         result = img_as_ubyte(video)
 
-        ### the generated video is 256x256, so we keep the aspect ratio, 
-        original_size = crop_info[0]
-        if original_size:
-            result = [ cv2.resize(result_i,(img_size, int(img_size * original_size[1]/original_size[0]) )) for result_i in result ]
+        if out_size:
+            result = [ cv2.resize(result_i, out_size) for result_i in result ]
         
         video_name = x['video_name']  + '.mp4'
         path = os.path.join(video_save_dir, 'temp_'+video_name)
@@ -206,18 +251,6 @@ class AnimateFromCoeff():
 
         av_path = os.path.join(video_save_dir, video_name)
         return_path = av_path 
-        
-        audio_path =  x['audio_path'] 
-        audio_name = os.path.splitext(os.path.split(audio_path)[-1])[0]
-        new_audio_path = os.path.join(video_save_dir, audio_name+'.wav')
-        start_time = 0
-        # cog will not keep the .mp3 filename
-        sound = AudioSegment.from_file(audio_path)
-        frames = frame_num 
-        end_time = start_time + frames*1/25*1000
-        word1=sound.set_frame_rate(16000)
-        word = word1[start_time:end_time]
-        word.export(new_audio_path, format="wav")
 
         save_video_with_watermark(path, new_audio_path, av_path, watermark= False)
         print(f'The generated video is named {video_save_dir}/{video_name}') 
@@ -227,28 +260,43 @@ class AnimateFromCoeff():
             video_name_full = x['video_name']  + '_full.mp4'
             full_video_path = os.path.join(video_save_dir, video_name_full)
             return_path = full_video_path
-            paste_pic(path, pic_path, crop_info, new_audio_path, full_video_path, extended_crop= True if 'ext' in preprocess.lower() else False)
+            paste_pic(path, pic_path, crop_info, new_audio_path, full_video_path, extended_crop= True if 'ext' in preprocess.lower() else False, progress_callback=progress_callback)
             print(f'The generated video is named {video_save_dir}/{video_name_full}') 
         else:
             full_video_path = av_path 
 
         #### paste back then enhancers
-        if enhancer:
+        if enhancer and compositor is not None:
+            # composite straight from the enhanced frames, the avatar is never encoded on its own
+            try:
+                enhanced_images_gen_with_len = enhancer_generator_with_len(full_video_path, method=enhancer, bg_upsampler=background_enhancer, progress_callback=progress_callback)
+                return_path = compositor.composite(enhanced_images_gen_with_len, new_audio_path)
+            except Exception as e:
+                # same fallback as without compositing: enhance the whole list first, then composite again
+                print(f'Enhancer generator failed ({e}), retrying with the enhancer list')
+                enhanced_images_gen_with_len = enhancer_list(full_video_path, method=enhancer, bg_upsampler=background_enhancer, progress_callback=progress_callback)
+                return_path = compositor.composite(enhanced_images_gen_with_len, new_audio_path)
+            print(f'The composited video is named {return_path}')
+        elif enhancer:
             video_name_enhancer = x['video_name']  + '_enhanced.mp4'
             enhanced_path = os.path.join(video_save_dir, 'temp_'+video_name_enhancer)
             av_path_enhancer = os.path.join(video_save_dir, video_name_enhancer) 
             return_path = av_path_enhancer
 
             try:
-                enhanced_images_gen_with_len = enhancer_generator_with_len(full_video_path, method=enhancer, bg_upsampler=background_enhancer)
+                enhanced_images_gen_with_len = enhancer_generator_with_len(full_video_path, method=enhancer, bg_upsampler=background_enhancer, progress_callback=progress_callback)
                 imageio.mimsave(enhanced_path, enhanced_images_gen_with_len, fps=float(25))
             except:
-                enhanced_images_gen_with_len = enhancer_list(full_video_path, method=enhancer, bg_upsampler=background_enhancer)
+                enhanced_images_gen_with_len = enhancer_list(full_video_path, method=enhancer, bg_upsampler=background_enhancer, progress_callback=progress_callback)
                 imageio.mimsave(enhanced_path, enhanced_images_gen_with_len, fps=float(25))
             
             save_video_with_watermark(enhanced_path, new_audio_path, av_path_enhancer, watermark= False)
             print(f'The generated video is named {video_save_dir}/{video_name_enhancer}')
             os.remove(enhanced_path)
+        elif compositor is not None:
+            frames = result if full_video_path == av_path else load_video_to_cv2(full_video_path)
+            return_path = compositor.composite(frames, new_audio_path)
+            print(f'The composited video is named {return_path}')
 
         os.remove(path)
         os.remove(new_audio_path)
@@ -2,7 +2,8 @@ from scipy.spatial import ConvexHull
 import torch
 import torch.nn.functional as F
 import numpy as np
-from tqdm import tqdm 
+
+from src.utils.progress import track
 
 def normalize_kp(kp_source, kp_driving, kp_driving_initial, adapt_movement_scale=False,
                  use_relative_movement=False, use_relative_jacobian=False):
@@ -102,7 +103,7 @@ def keypoint_transformation(kp_canonical, he, wo_exp=False):
 def make_animation(source_image, source_semantics, target_semantics,
                             generator, kp_detector, he_estimator, mapping, 
                             yaw_c_seq=None, pitch_c_seq=None, roll_c_seq=None,
-                            use_exp=True, use_half=False):
+                            use_exp=True, use_half=False, progress_callback=None, frame_callback=None):
     with torch.no_grad():
         predictions = []
 
@@ -110,7 +111,9 @@ def make_animation(source_image, source_semantics, target_semantics,
         he_source = mapping(source_semantics)
         kp_source = keypoint_transformation(kp_canonical, he_source)
     
-        for frame_idx in tqdm(range(target_semantics.shape[1]), 'Face Renderer:'):
+        # every step renders one frame for each of the batch_size sequences
+        batch_size = target_semantics.shape[0]
+        for frame_idx in track(range(target_semantics.shape[1]), 'Face Renderer:', 'face_renderer', progress_callback, step=batch_size):
             # still check the dimension
             # print(target_semantics.shape, source_semantics.shape)
             target_semantics_frame = target_semantics[:, frame_idx]
@@ -135,6 +138,8 @@ def make_animation(source_image, source_semantics, target_semantics,
             out = generator(source_image_new, kp_source=kp_source_new, kp_driving=kp_driving_new)
             '''
             predictions.append(out['prediction'])
+            if frame_callback is not None:
+                frame_callback(frame_idx, out['prediction'])
         predictions_ts = torch.stack(predictions, dim=1)
     return predictions_ts
 
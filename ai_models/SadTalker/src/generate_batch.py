@@ -1,11 +1,11 @@
 import os
 
-from tqdm import tqdm
 import torch
 import numpy as np
 import random
 import scipy.io as scio
 import src.utils.audio as audio
+from src.utils.progress import track
 
 def crop_pad_audio(wav, audio_length):
     if len(wav) > audio_length:
@@ -48,7 +48,7 @@ def generate_blink_seq_randomly(num_frames):
             break
     return ratio
 
-def get_data(first_coeff_path, audio_path, device, ref_eyeblink_coeff_path, still=False, idlemode=False, length_of_audio=False, use_blink=True):
+def get_data(first_coeff_path, audio_path, device, ref_eyeblink_coeff_path, still=False, idlemode=False, length_of_audio=False, use_blink=True, progress_callback=None):
 
     syncnet_mel_step_size = 16
     fps = 25
@@ -68,7 +68,7 @@ def get_data(first_coeff_path, audio_path, device, ref_eyeblink_coeff_path, stil
         spec = orig_mel.copy()         # nframes 80
         indiv_mels = []
 
-        for i in tqdm(range(num_frames), 'mel:'):
+        for i in track(range(num_frames), 'mel:', 'mel', progress_callback):
             start_frame_num = i-2
             start_idx = int(80. * (start_frame_num / float(fps)))
             end_idx = start_idx + syncnet_mel_step_size
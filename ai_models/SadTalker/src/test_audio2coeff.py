@@ -71,11 +71,11 @@ class Audio2Coeff():
  
         self.device = device
 
-    def generate(self, batch, coeff_save_dir, pose_style, ref_pose_coeff_path=None):
+    def generate(self, batch, coeff_save_dir, pose_style, ref_pose_coeff_path=None, progress_callback=None):
 
         with torch.no_grad():
             #test
-            results_dict_exp= self.audio2exp_model.test(batch)
+            results_dict_exp= self.audio2exp_model.test(batch, progress_callback=progress_callback)
             exp_pred = results_dict_exp['exp_coeff_pred']                         #bs T 64
 
             #for class_id in  range(1):
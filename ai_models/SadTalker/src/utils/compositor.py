@@ -0,0 +1,70 @@
+import subprocess
+
+import numpy as np
+
+
+# input 0 is the lesson (e.g. manim) video, input 1 the avatar frames
+LAYOUTS = {
+    # lesson left, avatar right, both scaled to the output height
+    'side_by_side': '[0:v]scale=-2:{height}[main];[1:v]scale=-2:{height}[avatar];'
+                    '[main][avatar]hstack=inputs=2,scale=trunc(iw/2)*2:trunc(ih/2)*2[v]',
+    # lesson full frame, avatar in the bottom right corner at a third of the height
+    'pip': '[0:v]scale=-2:{height}[main];[1:v]scale=-2:{pip_height}[avatar];'
+           '[main][avatar]overlay=W-w-{margin}:H-h-{margin},scale=trunc(iw/2)*2:trunc(ih/2)*2[v]',
+}
+
+
+class Compositor(object):
+    """ Composites the avatar frame stream with a lesson video in a single encode.
+
+    The avatar frames are piped raw into ffmpeg, so the avatar never gets encoded
+    on its own and decoded again just to be merged. """
+
+    def __init__(self, main_video, output_path, layout='side_by_side', height=720,
+                 preset='fast', crf=23, threads=0, audio_codec='aac', fps=25):
+        if layout not in LAYOUTS:
+            raise ValueError('Unknown layout %s, choose from %s' % (layout, list(LAYOUTS)))
+        self.main_video = main_video
+        self.output_path = output_path
+        self.layout = layout
+        self.height = height
+        self.preset = preset
+        self.crf = crf
+        self.threads = threads
+        self.audio_codec = audio_codec
+        self.fps = fps
+
+    def composite(self, frames, audio_path):
+        """ frames: iterable of HxWx3 uint8 RGB avatar frames, audio_path: the avatar's audio track.
+        audio_codec='copy' keeps the audio stream as is when the container allows it. """
+        process = None
+        try:
+            for frame in frames:
+                frame = np.ascontiguousarray(frame, dtype=np.uint8)
+                if process is None:
+                    process = self._start(frame.shape[1], frame.shape[0], audio_path)
+                process.stdin.write(frame.tobytes())
+        finally:
+            if process is not None:
+                process.stdin.close()
+                process.wait()
+
+        if process is None:
+            raise ValueError('No avatar frames to composite')
+        if process.returncode != 0:
+            raise RuntimeError('ffmpeg compositing failed with code %d' % process.returncode)
+        return self.output_path
+
+    def _start(self, width, height, audio_path):
+        filter_complex = LAYOUTS[self.layout].format(height=self.height, pip_height=self.height // 3, margin=16)
+        cmd = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+               '-i', self.main_video,
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', '%dx%d' % (width, height), '-r', str(self.fps), '-i', '-',
+               '-i', audio_path,
+               '-filter_complex', filter_complex,
+               '-map', '[v]', '-map', '2:a',
+               '-c:v', 'libx264', '-preset', self.preset, '-crf', str(self.crf), '-pix_fmt', 'yuv420p',
+               '-c:a', self.audio_codec,
+               '-threads', str(self.threads),
+               self.output_path]
+        return subprocess.Popen(cmd, stdin=subprocess.PIPE)
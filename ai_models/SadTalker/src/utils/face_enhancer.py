@@ -3,9 +3,8 @@ import torch
 
 from gfpgan import GFPGANer
 
-from tqdm import tqdm
-
 from src.utils.videoio import load_video_to_cv2
+from src.utils.progress import track
 
 import cv2
 
@@ -23,11 +22,11 @@ class GeneratorWithLen(object):
     def __iter__(self):
         return self.gen
 
-def enhancer_list(images, method='gfpgan', bg_upsampler='realesrgan'):
-    gen = enhancer_generator_no_len(images, method=method, bg_upsampler=bg_upsampler)
+def enhancer_list(images, method='gfpgan', bg_upsampler='realesrgan', progress_callback=None):
+    gen = enhancer_generator_no_len(images, method=method, bg_upsampler=bg_upsampler, progress_callback=progress_callback)
     return list(gen)
 
-def enhancer_generator_with_len(images, method='gfpgan', bg_upsampler='realesrgan'):
+def enhancer_generator_with_len(images, method='gfpgan', bg_upsampler='realesrgan', progress_callback=None):
     """ Provide a generator with a __len__ method so that it can passed to functions that
     call len()"""
 
@@ -35,11 +34,11 @@ def enhancer_generator_with_len(images, method='gfpgan', bg_upsampler='realesrga
         # TODO: Create a generator version of load_video_to_cv2
         images = load_video_to_cv2(images)
 
-    gen = enhancer_generator_no_len(images, method=method, bg_upsampler=bg_upsampler)
+    gen = enhancer_generator_no_len(images, method=method, bg_upsampler=bg_upsampler, progress_callback=progress_callback)
     gen_with_len = GeneratorWithLen(gen, len(images))
     return gen_with_len
 
-def enhancer_generator_no_len(images, method='gfpgan', bg_upsampler='realesrgan'):
+def enhancer_generator_no_len(images, method='gfpgan', bg_upsampler='realesrgan', progress_callback=None):
     """ Provide a generator function so that all of the enhanced images don't need
     to be stored in memory at the same time. This can save tons of RAM compared to
     the enhancer function. """
@@ -108,7 +107,7 @@ def enhancer_generator_no_len(images, method='gfpgan', bg_upsampler='realesrgan'
         bg_upsampler=bg_upsampler)
 
     # ------------------------ restore ------------------------
-    for idx in tqdm(range(len(images)), 'Face Enhancer:'):
+    for idx in track(range(len(images)), 'Face Enhancer:', 'face_enhancer', progress_callback):
         
         img = cv2.cvtColor(images[idx], cv2.COLOR_RGB2BGR)
         
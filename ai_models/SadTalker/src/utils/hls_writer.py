@@ -0,0 +1,87 @@
+import os
+import subprocess
+
+import numpy as np
+
+
+class HLSWriter(object):
+    """ Encodes frames into an HLS playlist with fMP4 segments while they are being rendered.
+
+    Frames may arrive out of order (the face renderer produces batch_size sequences at once),
+    they are buffered and piped to ffmpeg in order, so a segment is published as soon as
+    its frames exist. The playlist is of EVENT type and gets #EXT-X-ENDLIST on close().
+
+    The preview is best effort: if ffmpeg exits or its pipe breaks, the error is logged,
+    the writer disables itself and write()/close() never raise into the render. """
+
+    playlist_name = 'playlist.m3u8'
+
+    def __init__(self, hls_dir, audio_path, width, height, frame_num, fps=25, segment_seconds=2):
+        os.makedirs(hls_dir, exist_ok=True)
+        self.hls_dir = hls_dir
+        self.playlist_path = os.path.join(hls_dir, self.playlist_name)
+        self.width = width
+        self.height = height
+        self.frame_num = frame_num
+        self.next_index = 0
+        self.pending = {}
+        self.disabled = False
+
+        gop = int(fps * segment_seconds)
+        cmd = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', '%dx%d' % (width, height), '-r', str(fps), '-i', '-',
+               '-i', audio_path,
+               '-map', '0:v', '-map', '1:a', '-shortest',
+               '-vf', 'scale=trunc(iw/2)*2:trunc(ih/2)*2',
+               '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+               # fixed gop so that every segment starts on a keyframe
+               '-g', str(gop), '-keyint_min', str(gop), '-sc_threshold', '0',
+               '-c:a', 'aac',
+               '-f', 'hls', '-hls_time', str(segment_seconds), '-hls_playlist_type', 'event',
+               '-hls_segment_type', 'fmp4', '-hls_flags', 'independent_segments',
+               '-hls_segment_filename', os.path.join(hls_dir, 'segment_%05d.m4s'),
+               self.playlist_path]
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    def write(self, index, frame):
+        """ frame: HxWx3 uint8 RGB image, index: position of the frame in the video """
+        if self.disabled or index >= self.frame_num:
+            return  # preview stopped, or padding frames of the last batch
+        self.pending[index] = frame
+        try:
+            while self.next_index in self.pending:
+                self._pipe(self.pending.pop(self.next_index))
+                self.next_index += 1
+        except (OSError, ValueError) as e:
+            self._disable(e)
+
+    def close(self):
+        if self.disabled:
+            return None
+        try:
+            # flush whatever is left, e.g. if some frames were never produced
+            for index in sorted(self.pending):
+                self._pipe(self.pending[index])
+            self.pending = {}
+            self.process.stdin.close()
+            self.process.wait()
+        except (OSError, ValueError) as e:
+            self._disable(e)
+            return None
+        return self.playlist_path
+
+    def _disable(self, error):
+        print('HLS preview disabled, the render continues: %s' % error)
+        self.disabled = True
+        self.pending = {}
+        try:
+            self.process.kill()
+            self.process.wait()
+        except OSError:
+            pass
+
+    def _pipe(self, frame):
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if frame.shape[0] != self.height or frame.shape[1] != self.width:
+            raise ValueError('HLS frames must be %dx%d, got %dx%d' % (self.width, self.height, frame.shape[1], frame.shape[0]))
+        self.process.stdin.write(frame.tobytes())
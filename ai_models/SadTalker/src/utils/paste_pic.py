@@ -1,11 +1,11 @@
 import cv2, os
 import numpy as np
-from tqdm import tqdm
 import uuid
 
 from src.utils.videoio import save_video_with_watermark 
+from src.utils.progress import track
 
-def paste_pic(video_path, pic_path, crop_info, new_audio_path, full_video_path, extended_crop=False):
+def paste_pic(video_path, pic_path, crop_info, new_audio_path, full_video_path, extended_crop=False, progress_callback=None):
 
     if not os.path.isfile(pic_path):
         raise ValueError('pic_path must be a valid path to video/image file')
@@ -55,7 +55,7 @@ def paste_pic(video_path, pic_path, crop_info, new_audio_path, full_video_path,
 
     tmp_path = str(uuid.uuid4())+'.mp4'
     out_tmp = cv2.VideoWriter(tmp_path, cv2.VideoWriter_fourcc(*'MP4V'), fps, (frame_w, frame_h))
-    for crop_frame in tqdm(crop_frames, 'seamlessClone:'):
+    for crop_frame in track(crop_frames, 'seamlessClone:', 'seamless_clone', progress_callback):
         p = cv2.resize(crop_frame.astype(np.uint8), (ox2-ox1, oy2 - oy1)) 
 
         mask = 255*np.ones(p.shape, p.dtype)
@@ -0,0 +1,130 @@
+import json
+import os
+import time
+
+from tqdm import tqdm
+
+
+def track(iterable, desc, stage, progress_callback=None, frames_total=None, step=1):
+    """ tqdm wrapper that also reports progress_callback(stage, frames_done, frames_total, fps).
+
+    step is the number of frames covered by one item of iterable (e.g. audio2exp works on
+    chunks of 10 frames), frames_total caps the reported frame count. """
+
+    if frames_total is None:
+        frames_total = len(iterable) * step
+
+    if progress_callback is not None:
+        progress_callback(stage, 0, frames_total, 0.)
+
+    start = time.time()
+    for idx, item in enumerate(tqdm(iterable, desc), 1):
+        yield item
+        if progress_callback is not None:
+            frames_done = min(idx * step, frames_total)
+            elapsed = time.time() - start
+            fps = frames_done / elapsed if elapsed > 0 else 0.
+            progress_callback(stage, frames_done, frames_total, fps)
+
+
+# Relative per-frame cost of the stages (face_renderer = 1), used to estimate
+# stages that have not started yet from the speed measured so far.
+# 'encode' is the final mp4 / audio mux step, it reports no progress of its own.
+STAGE_COST_WEIGHTS = {
+    'mel': 0.01,
+    'audio2exp': 0.05,
+    'face_renderer': 1.,
+    'seamless_clone': 0.3,
+    'face_enhancer': 2.5,
+    'encode': 0.2,
+}
+
+
+class JobProgress(object):
+    """ Progress callback that persists the state of one inference job to a json file.
+
+    The file is rewritten atomically, at most every min_interval seconds (stage
+    boundaries are always written), so that a status endpoint can read it at any time. """
+
+    def __init__(self, path, stages=None, min_interval=0.5):
+        self.path = path
+        self.stages = list(stages) if stages else []
+        self.min_interval = min_interval
+        self.started_at = time.time()
+        self.last_write = 0.
+        self.state = {
+            'status': 'processing',
+            'stage': None,
+            'stage_index': 0,
+            'stages_total': len(self.stages),
+            'frames_done': 0,
+            'frames_total': 0,
+            'fps': 0.,
+            'eta_seconds': None,
+            'stage_eta_seconds': None,
+            'elapsed_seconds': 0.,
+            'stages': {},
+        }
+        self._write()
+
+    def __call__(self, stage, frames_done, frames_total, fps):
+        if stage not in self.stages:
+            self.stages.append(stage)
+            self.state['stages_total'] = len(self.stages)
+
+        remaining = max(frames_total - frames_done, 0)
+        stage_eta = remaining / fps if fps > 0 else None
+        eta = self._job_eta(stage, frames_total, fps, stage_eta)
+
+        self.state.update({
+            'stage': stage,
+            'stage_index': self.stages.index(stage) + 1,
+            'frames_done': frames_done,
+            'frames_total': frames_total,
+            'fps': round(fps, 2),
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'stage_eta_seconds': round(stage_eta, 1) if stage_eta is not None else None,
+            'elapsed_seconds': round(time.time() - self.started_at, 1),
+        })
+        self.state['stages'][stage] = {
+            'frames_done': frames_done,
+            'frames_total': frames_total,
+            'fps': round(fps, 2),
+        }
+
+        boundary = frames_done == 0 or frames_done >= frames_total
+        if boundary or time.time() - self.last_write >= self.min_interval:
+            self._write()
+
+    def _job_eta(self, stage, frames_total, fps, stage_eta):
+        """ Current stage ETA plus the later stages (and the final encode), estimated
+        from the current speed scaled by STAGE_COST_WEIGHTS. All stages work on the
+        video frames, so the largest frame count seen so far stands in for theirs. """
+        if stage_eta is None:
+            return None
+
+        weight = STAGE_COST_WEIGHTS.get(stage, 1.)
+        seconds_per_unit = 1. / (fps * weight)
+        frames = max([frames_total] + [s['frames_total'] for s in self.state['stages'].values()])
+
+        later = self.stages[self.stages.index(stage) + 1:] + ['encode']
+        return stage_eta + sum(frames * STAGE_COST_WEIGHTS.get(s, 1.) * seconds_per_unit for s in later)
+
+    def finish(self, video_path=None, error=None):
+        self.state.update({
+            'status': 'failed' if error else 'completed',
+            'eta_seconds': 0. if not error else None,
+            'stage_eta_seconds': 0. if not error else None,
+            'elapsed_seconds': round(time.time() - self.started_at, 1),
+            'video_path': video_path,
+            'error': error,
+        })
+        self._write()
+
+    def _write(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+        self.last_write = time.time()
+
@@ -0,0 +1,25 @@
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from services.document_service import (
+    get_ingestion_status,
+    is_document_ready,
+    restore_document,
+    STATUS_EVICTED
+)
+
+
+def ensure_document_ready(db: Session, document_id: str | None):
+    """
+    409 while a document is not queryable (ingesting, failed or evicted),
+    an evicted document is queued for re-ingestion
+    """
+    if document_id and not is_document_ready(db, document_id):
+        status = get_ingestion_status(db, document_id)
+        if not status:
+            raise HTTPException(status_code=404, detail="Document not found")
+        if status["status"] == STATUS_EVICTED and restore_document(db, document_id):
+            status["status"] = "pending"
+        raise HTTPException(
+            status_code=409,
+            detail=f"Document is not ready yet (status: {status['status']})"
+        )
@@ -1,9 +1,55 @@
-from fastapi import APIRouter
-from services.flashcard_service import generate_flashcards
+from fastapi import APIRouter, Depends, Header, Response
+from sqlalchemy.orm import Session
+from core.database import get_db
+from core.config import DEFAULT_FLASHCARD_COUNT
+from services.media_index import etag_matches
+from api.document_readiness import ensure_document_ready
+from utils.stream_utils import stream_items_response
+from services.study_artifact_service import stream_flashcard_set, get_or_generate_flashcards, paginate
 
 router = APIRouter(prefix="/flashcards",tags=["Flashcards"])
 
+@router.get("/{document_id}/stream")
+def stream_flashcards(
+    document_id: str,
+    count: int = DEFAULT_FLASHCARD_COUNT,
+    refresh: bool = False,
+    format: str = "ndjson",
+    db: Session = Depends(get_db)
+):
+    """
+    Same set as GET /flashcards/{document_id}, each card sent as soon as it is generated.
+
+    format=ndjson (one event per line) or sse, events: item, then done or error
+    """
+    ensure_document_ready(db, document_id)
+    return stream_items_response(stream_flashcard_set(document_id, count, refresh), format)
+
+
 @router.get("/{document_id}")
-def get_flashcards(document_id:str, count: int =10):
-    return generate_flashcards(document_id,count)
+def get_flashcards(
+    document_id:str,
+    response: Response,
+    count: int = DEFAULT_FLASHCARD_COUNT,
+    offset: int = 0,
+    limit: int | None = None,
+    refresh: bool = False,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Stored flashcards of the document, refresh=true generates a new set.
+
+    Asking for more than stored only generates the missing cards,
+    offset/limit page through the first count cards (X-Total-Count).
+    """
+    ensure_document_ready(db, document_id)
+    flashcards = get_or_generate_flashcards(db, document_id, count, refresh)
+    page, etag = paginate(flashcards, offset, limit)
+
+    headers = {"ETag": etag, "X-Total-Count": str(len(flashcards))}
+    if not refresh and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
 
+    response.headers.update(headers)
+    return page
@@ -56,7 +56,7 @@ class EvaluateMissingLinkResponse(BaseModel):
 # --------------------------------------------------
 
 @router.post("/generate", response_model=GenerateMissingLinkResponse)
-async def generate_missing_link(payload: GenerateMissingLinkRequest):
+def generate_missing_link(payload: GenerateMissingLinkRequest):
     """
     Generates a drag-and-drop 'complete the missing link' puzzle.
     """
@@ -76,7 +76,7 @@ async def generate_missing_link(payload: GenerateMissingLinkRequest):
 # --------------------------------------------------
 
 @router.post("/evaluate", response_model=EvaluateMissingLinkResponse)
-async def evaluate_missing_link(payload: EvaluateMissingLinkRequest):
+def evaluate_missing_link(payload: EvaluateMissingLinkRequest):
     """
     Evaluates learner's filled slots against the stored solution.
     """
@@ -43,7 +43,7 @@ class EvaluateMistakeResponse(BaseModel):
 # --------------------------------------------------
 
 @router.post("/generate", response_model=GenerateMistakeResponse)
-async def generate_mistake(payload: GenerateMistakeRequest):
+def generate_mistake(payload: GenerateMistakeRequest):
     """
     Generates a flawed artifact based on:
     - concept
@@ -66,7 +66,7 @@ async def generate_mistake(payload: GenerateMistakeRequest):
 # --------------------------------------------------
 
 @router.post("/evaluate", response_model=EvaluateMistakeResponse)
-async def evaluate_mistake(payload: EvaluateMistakeRequest):
+def evaluate_mistake(payload: EvaluateMistakeRequest):
     """
     Evaluates learner's correction against the stored flawed artifact.
     """
@@ -47,7 +47,7 @@ class TeachAIResponsePayload(BaseModel):
 # -----------------------------------
 
 @router.post("/start-session")
-async def teach_ai_start_session(
+def teach_ai_start_session(
     concept_id: str = Form(...),
     level: str = Form("beginner"),
 ):
@@ -86,7 +86,7 @@ async def teach_ai_start_session(
     "/evaluate-response",
     response_model=TeachAIResponsePayload
 )
-async def teach_ai_evaluate_response(
+def teach_ai_evaluate_response(
     session_id: str = Form(...),
     explanation: Optional[str] = Form(None),
     audio: Optional[UploadFile] = File(None),
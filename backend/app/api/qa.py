@@ -1,12 +1,17 @@
 from fastapi import UploadFile, APIRouter, File, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from core.database import get_db
-from services.document_service import ingest_document
-from services.qa_service import answer_ques
+from services.document_service import ingest_document, get_ingestion_status, get_chat_documents
+from services.document_service import retry_ingestion
+from api.document_readiness import ensure_document_ready
+from services.qa_service import answer_ques, answer_from_documents
+from services.answer_cache import answer_cache
+from services.llm_gateway import llm_gateway
+from services.vector_lifecycle_service import disk_usage_report, run_maintenance
 from services.sad_talker_service import run_sadtalker
 from services.tts_service import text_to_speech
 from services import chat_service, message_service
-from utils.file_utils import save_file
+from utils.file_utils import save_file, save_file_with_hash
 from core.config import DOCUMENT_UPLOAD_DIR
 from uuid import UUID
 import uuid
@@ -17,12 +22,17 @@ router = APIRouter(prefix="/qa", tags=["Document Ask Endpoints"])
 MANIM_SERVICE_URL = "http://127.0.0.1:8001/explain"
 
 @router.post("/upload-doc")
-async def upload_file(
+def upload_file(
     file: UploadFile = File(...),
     chat_id: UUID | None = Query(None),  # Made optional
     db: Session = Depends(get_db)
 ):
-    """Upload a document to a chat session (or standalone for Plan module)"""
+    """
+    Upload a document to a chat session (or standalone for Plan module)
+
+    Ingestion runs in the background, poll /qa/documents/{document_id}/status
+    until it is "ready" before asking questions about it.
+    """
     
     # If chat_id provided, validate it exists
     if chat_id:
@@ -30,11 +40,17 @@ async def upload_file(
         if not chat:
             raise HTTPException(status_code=404, detail="Chat not found")
     
-    # Save file
-    file_path = save_file(file, DOCUMENT_UPLOAD_DIR)
+    # Save file, hashing it while it streams to disk
+    file_path, content_hash = save_file_with_hash(file, DOCUMENT_UPLOAD_DIR)
     
-    # Ingest document
-    doc_id = ingest_document(file_path, chat_id, db)
+    # Queue ingestion (or reuse the collection of an identical upload)
+    doc_id = ingest_document(
+        file_path,
+        chat_id,
+        db,
+        file_name=file.filename,
+        content_hash=content_hash
+    )
     
     # Only store message if chat_id provided
     if chat_id:
@@ -50,23 +66,74 @@ async def upload_file(
     return {
         "document_id": doc_id,
         "chat_id": chat_id,
-        "status": "uploaded",
+        # "ready" right away when an identical document was already ingested
+        "status": get_ingestion_status(db, doc_id)["status"],
         "filename": file.filename
     }
 
+@router.get("/documents/{document_id}/status")
+def document_status(document_id: UUID, db: Session = Depends(get_db)):
+    """Ingestion progress of an uploaded document"""
+    status = get_ingestion_status(db, str(document_id))
+    if not status:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return status
+
+@router.post("/documents/{document_id}/retry")
+def retry_document_ingestion(document_id: UUID, db: Session = Depends(get_db)):
+    """Retry a failed ingestion, it resumes after the last embedded page"""
+    if not retry_ingestion(db, str(document_id)):
+        status = get_ingestion_status(db, str(document_id))
+        if not status:
+            raise HTTPException(status_code=404, detail="Document not found")
+        raise HTTPException(
+            status_code=409,
+            detail=f"Only failed ingestions can be retried (status: {status['status']})"
+        )
+    return get_ingestion_status(db, str(document_id))
+
+@router.get("/cache/stats")
+def answer_cache_stats():
+    """Semantic answer cache metrics (hits, near misses, misses, bypassed)"""
+    return answer_cache.stats()
+
+@router.get("/llm/stats")
+def llm_stats():
+    """LLM gateway metrics per profile (calls, retries, errors, latency, tokens)"""
+    return llm_gateway.stats()
+
+@router.get("/storage/usage")
+def storage_usage():
+    """Disk usage of the vector store and the artifacts stored next to it"""
+    return disk_usage_report()
+
+@router.post("/storage/maintenance")
+def storage_maintenance():
+    """Run vector store maintenance now (orphan sweep, quota eviction, compaction)"""
+    return run_maintenance()
+
 @router.post("/ask")
-async def ask_question(
+def ask_question(
     chat_id: UUID,
     question: str,
     document_id: str | None = None,
+    all_documents: bool = False,
     video_enabled: bool = False,
     face_enabled: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Ask a question in a chat session"""
+    """
+    Ask a question in a chat session
+
+    all_documents=true searches every ready document of the chat
+    (document_id is ignored) and returns the source documents used.
+    """
     chat = chat_service.get_chat(db, chat_id)
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
+
+    if not all_documents:
+        ensure_document_ready(db, document_id)
     
     # Validation: face_enabled requires video_enabled
     if face_enabled and not video_enabled:
@@ -87,23 +154,39 @@ async def ask_question(
     messages = message_service.get_messages(db, chat_id)
     context = message_service.build_context_for_llm(messages)
     
+    chat_documents = {}
+    if all_documents:
+        chat_documents = {
+            str(d.document_id): d.file_name
+            for d in get_chat_documents(db, chat_id)
+        }
+        document_id = None
+
     # Store user message
     message_service.create_message(
         db=db,
         chat_id=chat_id,
         role="user",
         content=question,
-        document_ids=[document_id] if document_id else None
+        document_ids=list(chat_documents) or ([document_id] if document_id else None)
     )
     
     # Generate answer with context
-    answer = answer_ques(question, document_id, context=context)
+    sources = None
+    if chat_documents:
+        result = answer_from_documents(question, chat_documents, context=context)
+        answer, sources = result["answer"], result["sources"]
+    else:
+        answer = answer_ques(question, document_id, context=context)
     
     response = {
         "answer": answer,
         "video_enabled": video_enabled,
         "face_enabled": face_enabled
     }
+
+    if sources is not None:
+        response["sources"] = sources
     
     video_ids = []
     
@@ -167,6 +250,8 @@ def ask_from_image(
     chat = chat_service.get_chat(db, chat_id)
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
+
+    ensure_document_ready(db, document_id)
     
     # Validation: face_enabled requires video_enabled
     if face_enabled and not video_enabled:
@@ -1,8 +1,55 @@
-from fastapi import APIRouter
-from services.quiz_service import generate_quiz
+from fastapi import APIRouter, Depends, Header, Response
+from sqlalchemy.orm import Session
+from core.database import get_db
+from core.config import DEFAULT_QUIZ_COUNT
+from services.media_index import etag_matches
+from api.document_readiness import ensure_document_ready
+from utils.stream_utils import stream_items_response
+from services.study_artifact_service import stream_quiz_set, get_or_generate_quiz, paginate
 
 router = APIRouter(prefix="/quiz", tags=["Quiz"])
 
+@router.get("/{document_id}/stream")
+def stream_quiz(
+    document_id: str,
+    count: int = DEFAULT_QUIZ_COUNT,
+    refresh: bool = False,
+    format: str = "ndjson",
+    db: Session = Depends(get_db)
+):
+    """
+    Same set as GET /quiz/{document_id}, each question sent as soon as it is generated.
+
+    format=ndjson (one event per line) or sse, events: item, then done or error
+    """
+    ensure_document_ready(db, document_id)
+    return stream_items_response(stream_quiz_set(document_id, count, refresh), format)
+
+
 @router.get("/{document_id}")
-def get_quiz(document_id: str, count: int = 5):
-    return generate_quiz(document_id, count)
+def get_quiz(
+    document_id: str,
+    response: Response,
+    count: int = DEFAULT_QUIZ_COUNT,
+    offset: int = 0,
+    limit: int | None = None,
+    refresh: bool = False,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Stored quiz of the document, refresh=true generates a new one.
+
+    Asking for more than stored only generates the missing questions,
+    offset/limit page through the first count questions (X-Total-Count).
+    """
+    ensure_document_ready(db, document_id)
+    quiz = get_or_generate_quiz(db, document_id, count, refresh)
+    page, etag = paginate(quiz, offset, limit)
+
+    headers = {"ETag": etag, "X-Total-Count": str(len(quiz))}
+    if not refresh and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return page
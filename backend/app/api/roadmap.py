@@ -3,7 +3,9 @@ from pydantic import BaseModel
 from typing import Optional
 from sqlalchemy.orm import Session
 from services.roadmap_service import generate_roadmap
+from services.study_artifact_service import get_or_generate_roadmap
 from services import roadmap_db_service
+from api.document_readiness import ensure_document_ready
 from core.database import get_db
 from core.schemas import RoadmapResponse, RoadmapListItem
 from uuid import UUID
@@ -14,6 +16,7 @@ class RoadmapRequest(BaseModel):
     user_input: str
     document_id: Optional[str] = None
     save: bool = True  # Whether to save to database
+    refresh: bool = False  # Regenerate instead of using the pre-generated document roadmap
 
 @router.post("/", response_model=RoadmapResponse)
 def get_roadmap(
@@ -21,8 +24,13 @@ def get_roadmap(
     db: Session = Depends(get_db)
 ):
     """Generate a new roadmap and optionally save it"""
-    # Generate roadmap using existing service
-    roadmap_data = generate_roadmap(request.user_input, request.document_id)
+    ensure_document_ready(db, request.document_id)
+
+    # Document-only roadmaps are pre-generated after ingestion
+    if request.document_id and not request.user_input.strip():
+        roadmap_data = get_or_generate_roadmap(db, request.document_id, request.refresh)
+    else:
+        roadmap_data = generate_roadmap(request.user_input, request.document_id)
     
     # Generate title from user input or first node
     title = request.user_input[:100] if request.user_input else "Untitled Roadmap"
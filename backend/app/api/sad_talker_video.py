@@ -1,18 +1,33 @@
-from fastapi import APIRouter,UploadFile,File
-from fastapi.responses import FileResponse
-from services.sad_talker_service import run_sadtalker
-from core.config import INPUT_IMAGE_DIR,INPUT_AUDIO_DIR,OUTPUT_VIDEO_DIR
-from utils.file_utils import find_sadtaker_video
+from fastapi import APIRouter,UploadFile,File,Request,HTTPException,Header
+from fastapi.responses import FileResponse, StreamingResponse, Response
+from services.sad_talker_service import run_sadtalker, get_job_progress, suggest_poll_interval, get_playlist_url, get_hls_file, HLS_PLAYLIST_NAME
+from services.job_events import job_events, TERMINAL_EVENTS
+from services.media_index import media_index, etag_matches
+from core.config import INPUT_IMAGE_DIR,INPUT_AUDIO_DIR,INPUT_VIDEO_DIR,OUTPUT_VIDEO_DIR,COMPOSITE_LAYOUT,COMPOSITE_LAYOUTS
 import os
 import shutil
 import uuid
+import json
+import asyncio
 
 router = APIRouter(prefix="/video",tags=["SadTalker Vdeo"])
 
+# Comment line sent when no event arrived for a while, keeps proxies from closing the stream
+SSE_KEEPALIVE_SECONDS = 15
+
+# Generated videos never change once written, let browsers and CDNs keep them
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
 @router.post("/generate")
 async def generate_video(image: UploadFile = File(...), 
-                        audio: UploadFile = File(...)
+                        audio: UploadFile = File(...),
+                        lesson_video: UploadFile | None = File(None),
+                        layout: str = COMPOSITE_LAYOUT
                     ):
+    # Checked here, an invalid value would only surface as an argparse exit of the job
+    if layout not in COMPOSITE_LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"layout must be one of {', '.join(COMPOSITE_LAYOUTS)}")
+
     job_id = str(uuid.uuid4())
     image_path = os.path.join(INPUT_IMAGE_DIR, image.filename)
     audio_path = os.path.join(INPUT_AUDIO_DIR, audio.filename)
@@ -23,7 +38,14 @@ async def generate_video(image: UploadFile = File(...),
     with open(audio_path,"wb") as audio_file:
         shutil.copyfileobj(audio.file,audio_file)
 
-    job_id = run_sadtalker(image_path, audio_path,job_id)
+    # Optional lesson video, composited with the avatar in the same job
+    lesson_path = None
+    if lesson_video:
+        lesson_path = os.path.join(INPUT_VIDEO_DIR, f"{job_id}.mp4")
+        with open(lesson_path,"wb") as lesson_file:
+            shutil.copyfileobj(lesson_video.file,lesson_file)
+
+    job_id = run_sadtalker(image_path, audio_path,job_id, main_video=lesson_path, layout=layout)
     
     return {
         "status": "processing",
@@ -38,30 +60,153 @@ def get_video(job_id:str):
 
     if not os.path.exists(job_dir):
         return {"Status": "Notfound"}
-    
-    video = find_sadtaker_video(job_dir)
 
-    if video:
+    # A job this process is still watching has no video yet, skip the directory scan
+    last_event = job_events.last_event(job_id)
+    running = last_event is not None and last_event["type"] not in TERMINAL_EVENTS
+
+    if not running and media_index.lookup(job_id):
         return {
             "status": "completed",
             "job_id": job_id
         }
+
+    # The watcher saw the process exit without a video (also covers crashes that never wrote the progress file)
+    if last_event is not None and last_event["type"] == "failed":
+        return {
+            "status": "failed",
+            "job_id": job_id,
+            "error": last_event.get("error")
+        }
+
+    progress = get_job_progress(job_id)
+    if progress and progress.get("status") == "failed":
+        return {
+            "status": "failed",
+            "job_id": job_id,
+            "error": progress.get("error")
+        }
     
     return {
         "status": "processsing",
-        "job_id": job_id
+        "job_id": job_id,
+        "progress": progress,
+        "playlist_url": get_playlist_url(job_id),
+        "eta_seconds": progress.get("eta_seconds") if progress else None,
+        "poll_after_seconds": suggest_poll_interval(progress)
     }
 
 @router.get("/result/{job_id}")
-def get_video(job_id: str):
-    job_dir = os.path.join(OUTPUT_VIDEO_DIR, job_id)
+def get_video(job_id: str, if_none_match: str | None = Header(None)):
+    """
+    Serve a finished video.
 
-    video_path = find_sadtaker_video(job_dir)
-    if not video_path:
+    Byte ranges (Range / If-Range) are handled by FileResponse,
+    conditional requests are answered with 304 using the content-hash ETag.
+    """
+    entry = media_index.lookup(job_id)
+    if not entry:
         return {"error": "Video not ready"}
 
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL
+    }
+
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+
     return FileResponse(
-        video_path,
+        entry.path,
         media_type="video/mp4",
-        filename="lesson_video.mp4"
-    )
\ No newline at end of file
+        filename="lesson_video.mp4",
+        headers=headers
+    )
+
+
+@router.get("/hls/{job_id}/{file_name}")
+def get_hls(job_id: str, file_name: str):
+    """
+    Progressive preview of a running job: the HLS playlist grows while
+    frames are rendered, segments never change once written.
+    """
+    path = get_hls_file(job_id, file_name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Stream not available")
+
+    if file_name == HLS_PLAYLIST_NAME:
+        return FileResponse(
+            path,
+            media_type="application/vnd.apple.mpegurl",
+            headers={"Cache-Control": "no-cache"}
+        )
+
+    return FileResponse(
+        path,
+        media_type="video/mp4",
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    )
+
+
+@router.get("/events/{job_id}")
+async def stream_video_events(job_id: str, request: Request):
+    """
+    Server-Sent Events stream of a video job: progress events,
+    then a final "completed" (with the result URL) or "failed" event.
+    """
+    job_dir = os.path.join(OUTPUT_VIDEO_DIR, job_id)
+    if not os.path.exists(job_dir) and not job_events.last_event(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        # Jobs finished before this process started have no events, answer from disk
+        if not job_events.last_event(job_id) and media_index.lookup(job_id):
+            yield _format_sse({
+                "type": "completed",
+                "status": "completed",
+                "job_id": job_id,
+                "url": f"/video/result/{job_id}"
+            })
+            return
+
+        progress = None if job_events.last_event(job_id) else get_job_progress(job_id)
+        if progress and progress.get("status") == "failed":
+            # Failed under an earlier process, no event or video will ever come
+            yield _format_sse({
+                "type": "failed",
+                "status": "failed",
+                "job_id": job_id,
+                "error": progress.get("error")
+            })
+            return
+
+        queue = job_events.subscribe(job_id)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield _format_sse(event)
+
+                if event["type"] in TERMINAL_EVENTS:
+                    break
+        finally:
+            job_events.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+def _format_sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
@@ -10,13 +10,137 @@ DOCUMENT_UPLOAD_DIR = os.path.join(DATA_DIR, "documents")
 AUDIO_DIR = os.path.join(DATA_DIR,"audio/answers")
 
 VECTOR_DB_DIR = os.path.join(BASE_DIR, "backend", "app", "vectorstore", "chroma_db")
+LEXICAL_INDEX_DIR = os.path.join(BASE_DIR, "backend", "app", "vectorstore", "bm25")
+SUMMARY_DIR = os.path.join(BASE_DIR, "backend", "app", "vectorstore", "summaries")
+KEY_CONCEPTS_DIR = os.path.join(BASE_DIR, "backend", "app", "vectorstore", "concepts")
+
+# ==============================
+# RETRIEVAL
+# ==============================
+EMBEDDING_MODEL = "nomic-embed-text-v1.5"
+VECTOR_COLLECTION_CACHE_SIZE = 128  # Open collection handles kept per process
+
+# "per_document": one Chroma collection per document
+# "shared": chunks of all documents in SHARED_COLLECTION_SHARDS collections, filtered by document_id
+# Switching an existing store to "shared" needs scripts/migrate_to_shared_collections.py
+VECTOR_STORAGE_MODE = os.getenv("VECTOR_STORAGE_MODE", "per_document")
+SHARED_COLLECTION_PREFIX = "documents_shard_"
+SHARED_COLLECTION_SHARDS = int(os.getenv("SHARED_COLLECTION_SHARDS", "1"))
+
+# Vector store lifecycle: 0 disables the quota (cold documents are evicted above it)
+VECTOR_STORE_QUOTA_MB = int(os.getenv("VECTOR_STORE_QUOTA_MB", "0"))
+VECTOR_MAINTENANCE_INTERVAL_SECONDS = int(os.getenv("VECTOR_MAINTENANCE_INTERVAL_SECONDS", str(6 * 3600)))
+
+# Fixed retrieval queries, their embeddings are pinned in the cache
+SUMMARY_QUERY = "summary of the document"
+CONCEPTS_QUERY = "core concepts and key ideas of the document"
+
+# Hybrid retrieval: vector and BM25 hits fused with reciprocal rank fusion
+RETRIEVAL_VECTOR_K = int(os.getenv("RETRIEVAL_VECTOR_K", "8"))
+RETRIEVAL_LEXICAL_K = int(os.getenv("RETRIEVAL_LEXICAL_K", "8"))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "6"))  # Chunks that go into the prompt
+RRF_K = 60
+VECTOR_SCORE_THRESHOLD = 0.6  # Chroma distance, lower is closer
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))  # Retrieved context per prompt
+LEXICAL_INDEX_CACHE_SIZE = 64
+
+# Key concepts artifact shared by flashcards, quizzes and roadmaps (MMR over CONCEPTS_QUERY)
+KEY_CONCEPTS_K = 15
+KEY_CONCEPTS_FETCH_K = 60  # Candidates MMR picks diverse chunks from
+KEY_CONCEPTS_CACHE_SIZE = 256
+# Chats with several documents: documents searched in parallel, weight of vector vs BM25 score
+MULTI_DOCUMENT_CONCURRENCY = 8
+MULTI_DOCUMENT_VECTOR_WEIGHT = 0.7
+
+# Semantic answer cache (cosine similarity of question embeddings)
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_NEAR_MISS_THRESHOLD = 0.85  # Counted in metrics only
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(24 * 3600)))
+ANSWER_CACHE_MAX_PER_DOCUMENT = 256
+
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+# Chunk embeddings live mostly on disk, the memory tier only has to cover one ingestion batch
+DOCUMENT_EMBEDDING_CACHE_SIZE = 2048
+EMBEDDING_BATCH_SIZE = 256  # Texts per embedding provider request
+# On-disk embedding cache tier, set EMBEDDING_DISK_CACHE=false to keep it in memory only
+EMBEDDING_CACHE_PATH = (
+    os.path.join(DATA_DIR, "cache", "embeddings.sqlite3")
+    if os.getenv("EMBEDDING_DISK_CACHE", "true").lower() == "true"
+    else None
+)
+
+# ==============================
+# STUDY ARTIFACTS
+# ==============================
+# Sizes pre-generated after ingestion, also the endpoint defaults
+DEFAULT_FLASHCARD_COUNT = 10
+DEFAULT_QUIZ_COUNT = 5
+# Larger requests are split over document sections generated concurrently
+FANOUT_MIN_COUNT = 15
+FANOUT_ITEMS_PER_SECTION = 5
+FANOUT_MAX_SECTIONS = 12
+FANOUT_SECTION_CHARS = 6000  # Context per section prompt
+FANOUT_CONCURRENCY = 4
+FANOUT_DEDUPE_THRESHOLD = 0.9  # Cosine similarity above which two questions are duplicates
+
+# ==============================
+# LLM GATEWAY
+# ==============================
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "32"))
+LLM_POOL_MAX_KEEPALIVE = 16
+LLM_DEFAULT_TIMEOUT_SECONDS = 60
+LLM_MAX_RETRIES = 3
+LLM_BACKOFF_BASE_SECONDS = 0.5  # Full jitter: sleep uniform(0, min(max, base * 2 ** attempt))
+LLM_BACKOFF_MAX_SECONDS = 8.0
+# Per call site model configuration, services pass the profile name.
+# Identical concurrent prompts share one upstream request unless "coalesce" is False
+LLM_PROFILES = {
+    "qa": {"model": "llama-3.3-70b-versatile", "temperature": 0.2, "max_tokens": 512, "timeout": 30},
+    "summary": {"model": "llama-3.3-70b-versatile", "temperature": 0.2, "max_tokens": 512, "timeout": 60},
+    "flashcards": {"model": "llama-3.3-70b-versatile", "temperature": 0.3},
+    "quiz": {"model": "llama-3.3-70b-versatile", "temperature": 0.2},
+    "roadmap": {"model": "llama-3.3-70b-versatile", "temperature": 0.2},
+    "play": {
+        "model": "openai/gpt-oss-120b",
+        "temperature": 0.2,
+        "system_prompt": "You are a strict evaluator. Return JSON only.",
+        "coalesce": False  # Game content should vary between players
+    },
+}
+
+# ==============================
+# INGESTION
+# ==============================
+BACKGROUND_JOB_WORKERS = int(os.getenv("BACKGROUND_JOB_WORKERS", "2"))
+# Separate workers for LLM heavy follow-up work (summary tree, study artifacts),
+# a long summary never holds a worker new ingestions are waiting for
+LLM_JOB_WORKERS = int(os.getenv("LLM_JOB_WORKERS", "2"))
+INGESTION_PARSE_WORKERS = int(os.getenv("INGESTION_PARSE_WORKERS", "4"))  # Processes parsing PDF pages
+INGESTION_PAGES_PER_TASK = 8
+# Pages read, split and embedded per step, a checkpoint is committed after each
+INGESTION_PAGES_PER_BATCH = 32
+INGESTION_EMBED_BATCH_SIZE = 256  # Chunks embedded and written per Chroma call
+CHUNK_SIZE = 700
+# Map-reduce summary tree built after ingestion
+SUMMARY_LEAF_CHARS = 6000  # Page text per map call
+SUMMARY_SECTION_FANOUT = 8  # Summaries merged per reduce call
+SUMMARY_CONCURRENCY = 4
+CHUNK_OVERLAP = 150
 
 INPUT_IMAGE_DIR = os.path.join(DATA_DIR, "input_images")
 INPUT_AUDIO_DIR = os.path.join(DATA_DIR, "input_audio")
+INPUT_VIDEO_DIR = os.path.join(DATA_DIR, "input_videos")
 OUTPUT_VIDEO_DIR = os.path.join(DATA_DIR, "generated_videos")
 
+# Lesson video compositing (Manim + SadTalker avatar)
+COMPOSITE_LAYOUTS = ("side_by_side", "pip")
+COMPOSITE_LAYOUT = "side_by_side"
+COMPOSITE_PRESET = "fast"
+COMPOSITE_THREADS = int(os.getenv("COMPOSITE_THREADS", "0"))  # 0 lets ffmpeg decide
+
 os.makedirs(INPUT_IMAGE_DIR, exist_ok=True)
 os.makedirs(INPUT_AUDIO_DIR, exist_ok=True)
+os.makedirs(INPUT_VIDEO_DIR, exist_ok=True)
 os.makedirs(OUTPUT_VIDEO_DIR, exist_ok=True)
 os.makedirs(DOCUMENT_UPLOAD_DIR, exist_ok=True)
 os.makedirs(VECTOR_DB_DIR, exist_ok=True)
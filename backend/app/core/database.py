@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from core.config import NEON_DATABASE_URL
@@ -12,4 +12,30 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def add_missing_columns(bind=engine):
+    """
+    create_all only creates missing tables, add columns that were
+    introduced on existing models (nullable / defaulted columns only)
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {column.name} {column_type}'
+                ))
+                if column.index:
+                    conn.execute(text(
+                        f'CREATE INDEX IF NOT EXISTS ix_{table.name}_{column.name} '
+                        f'ON {table.name} ({column.name})'
+                    ))
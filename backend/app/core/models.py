@@ -33,6 +33,17 @@ class Document(Base):
     file_path = Column(Text, nullable=False)
     storage_url = Column(Text)
     created_at = Column(DateTime, server_default=func.now())
+    # Ingestion progress, rows created before async ingestion have no status and are ready
+    status = Column(String(20))  # pending | processing | ready | failed | evicted
+    pages_total = Column(Integer)
+    pages_parsed = Column(Integer, default=0)
+    chunks_embedded = Column(Integer, default=0)
+    checkpoint_page = Column(Integer)  # Last page whose chunks are all embedded, ingestion resumes after it
+    error = Column(Text)
+    # sha256 of the uploaded file, identical uploads share one vector collection
+    content_hash = Column(String(64), index=True)
+    collection_name = Column(String(64))  # NULL means the collection is named after document_id
+    last_accessed_at = Column(DateTime)  # Vector store LRU eviction
 
 class Video(Base):
     __tablename__ = "videos"
@@ -54,4 +65,18 @@ class Roadmap(Base):
     document_id = Column(UUID(as_uuid=True), ForeignKey("documents.document_id", ondelete="SET NULL"), nullable=True)
     roadmap_data = Column(JSON, nullable=False)  # Store the nodes and edges JSON
     created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class StudyArtifact(Base):
+    __tablename__ = "study_artifacts"
+
+    # Generated flashcards / quiz / roadmap of a document, keyed by the collection owner
+    artifact_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.document_id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String(20), nullable=False)  # flashcards | quiz | roadmap
+    item_count = Column(Integer)  # Items in data, sets grow when more are requested
+    prompt_version = Column(String(20))  # A new prompt or model makes stored sets stale
+    model = Column(String(100))
+    data = Column(JSON, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
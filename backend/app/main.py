@@ -10,11 +10,15 @@ from api.play.find_mistake import router as find_mistake
 from api.play.complete_missing_link import router as complete_missing_link
 from api.manim_generator import router as manim_generator
 from api.chat_history import router as chat_history_router
-from core.database import engine, Base
+from core.database import engine, Base, add_missing_columns
+from services.vector_store_service import vector_store
+from services.vector_lifecycle_service import start_maintenance
+from services.document_service import resume_interrupted_ingestions
 from fastapi.middleware.cors import CORSMiddleware
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
 
 app = FastAPI(title="Bloop!")
 
@@ -37,6 +41,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def warm_up():
+    # Build the shared embedding + Chroma clients before the first request
+    vector_store.warm_up()
+    # Orphan cleanup, quota eviction and compaction of the vector store
+    start_maintenance()
+    # Ingestion jobs of a previous process continue from their checkpoints
+    resume_interrupted_ingestions()
+
 @app.get("/")
 def health():
     return {
@@ -0,0 +1,93 @@
+"""
+Query latency of per-document collections vs one shared, metadata-filtered
+collection as the number of documents grows.
+
+Uses random embeddings in a temporary Chroma store, so it needs neither
+an embedding provider nor the real vector store:
+
+    python scripts/benchmark_vector_storage.py --documents 100 1000 5000
+"""
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+import chromadb
+
+
+def random_vectors(count: int, dim: int) -> list[list[float]]:
+    return [[random.random() for _ in range(dim)] for _ in range(count)]
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def populate(client, documents: int, chunks: int, dim: int):
+    shared = client.get_or_create_collection("documents_shard_0")
+    for d in range(documents):
+        doc_id = f"doc-{d}"
+        ids = [f"{doc_id}-{i}" for i in range(chunks)]
+        texts = [f"chunk {i} of {doc_id}" for i in range(chunks)]
+        embeddings = random_vectors(chunks, dim)
+
+        client.get_or_create_collection(doc_id).add(ids=ids, embeddings=embeddings, documents=texts)
+        shared.add(
+            ids=ids,
+            embeddings=embeddings,
+            documents=texts,
+            metadatas=[{"document_id": doc_id}] * chunks
+        )
+
+
+def measure(client, documents: int, queries: int, dim: int, k: int) -> dict:
+    per_document, shared_filtered = [], []
+    shared = client.get_collection("documents_shard_0")
+
+    for _ in range(queries):
+        doc_id = f"doc-{random.randrange(documents)}"
+        query = random_vectors(1, dim)
+
+        # Collection opened per query, as a process serving many documents mostly does
+        start = time.perf_counter()
+        client.get_collection(doc_id).query(query_embeddings=query, n_results=k)
+        per_document.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        shared.query(query_embeddings=query, n_results=k, where={"document_id": doc_id})
+        shared_filtered.append((time.perf_counter() - start) * 1000)
+
+    return {
+        mode: (statistics.median(values), percentile(values, 0.95))
+        for mode, values in (("per_document", per_document), ("shared", shared_filtered))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--chunks", type=int, default=50, help="Chunks per document")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'documents':>10} {'mode':>14} {'p50 ms':>10} {'p95 ms':>10}")
+    for documents in args.documents:
+        path = tempfile.mkdtemp(prefix="vector_benchmark_")
+        try:
+            client = chromadb.PersistentClient(path=path)
+            populate(client, documents, args.chunks, args.dim)
+            results = measure(client, documents, args.queries, args.dim, args.k)
+
+            for mode, (p50, p95) in results.items():
+                print(f"{documents:>10} {mode:>14} {p50:>10.2f} {p95:>10.2f}")
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Copy per-document Chroma collections into the shared (sharded) collections.
+
+Stored embeddings are copied as they are, nothing is re-embedded.
+Run from backend/app, then set VECTOR_STORAGE_MODE=shared:
+
+    python scripts/migrate_to_shared_collections.py [--delete-source] [--batch-size 1000]
+"""
+import argparse
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config import SHARED_COLLECTION_PREFIX
+from services.vector_store_service import vector_store, shard_name
+
+
+def migrate_collection(client, name: str, batch_size: int) -> int:
+    source = client.get_collection(name)
+    # Same settings langchain_chroma creates collections with (default L2 space)
+    target = client.get_or_create_collection(shard_name(name))
+
+    copied = 0
+    while True:
+        batch = source.get(
+            include=["documents", "metadatas", "embeddings"],
+            limit=batch_size,
+            offset=copied
+        )
+        if not batch["ids"]:
+            break
+
+        metadatas = [
+            {**(metadata or {}), "document_id": name}
+            for metadata in batch["metadatas"]
+        ]
+        target.upsert(
+            ids=batch["ids"],
+            embeddings=batch["embeddings"],
+            documents=batch["documents"],
+            metadatas=metadatas
+        )
+        copied += len(batch["ids"])
+
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delete-source", action="store_true", help="Delete each collection once it is copied")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    client = vector_store.client
+    names = [
+        c.name for c in client.list_collections()
+        if not c.name.startswith(SHARED_COLLECTION_PREFIX)
+    ]
+    print(f"Migrating {len(names)} collections from {vector_store.persist_directory}\n")
+
+    total = 0
+    for i, name in enumerate(names, 1):
+        try:
+            copied = migrate_collection(client, name, args.batch_size)
+        except Exception as e:
+            print(f"❌ [{i}/{len(names)}] {name}: {e}")
+            continue
+
+        expected = client.get_collection(name).count()
+        if copied != expected:
+            print(f"❌ [{i}/{len(names)}] {name}: copied {copied} of {expected} chunks, source kept")
+            continue
+
+        total += copied
+        if args.delete_source:
+            client.delete_collection(name)
+        print(f"✅ [{i}/{len(names)}] {name}: {copied} chunks -> {shard_name(name)}")
+
+    print(f"\nDone, {total} chunks migrated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+from core.config import (
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_NEAR_MISS_THRESHOLD,
+    ANSWER_CACHE_TTL_SECONDS,
+    ANSWER_CACHE_MAX_PER_DOCUMENT
+)
+
+# Words that point back into the conversation ("explain it again", "what about that one")
+CONVERSATION_REFERENCES = re.compile(
+    r"\b(it|its|that|those|they|them|he|she|above|previous|earlier|again|"
+    r"you said|last answer|elaborate|continue)\b",
+    re.IGNORECASE
+)
+
+
+def is_conversation_dependent(question: str, context: list[dict] | None) -> bool:
+    """A follow-up only makes sense with the chat history, its answer must not be shared"""
+    if not context:
+        return False
+    return bool(CONVERSATION_REFERENCES.search(question)) or len(question.split()) < 4
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    embedding: np.ndarray  # unit length
+    answer: str
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """
+    Per-collection cache of answers, looked up by question embedding similarity.
+
+    - A hit needs cosine similarity >= threshold
+    - Lookups between near_miss_threshold and threshold are counted as
+      near misses, to tune the threshold from real traffic
+    - Entries expire after ttl_seconds, a collection is invalidated when re-ingested
+    - Keyed by collection, so deduplicated uploads share answers
+    """
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        near_miss_threshold: float = ANSWER_CACHE_NEAR_MISS_THRESHOLD,
+        ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+        max_per_collection: int = ANSWER_CACHE_MAX_PER_DOCUMENT
+    ):
+        self.threshold = threshold
+        self.near_miss_threshold = near_miss_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_per_collection = max_per_collection
+
+        self._lock = threading.Lock()
+        self._entries: dict[str, list[CachedAnswer]] = defaultdict(list)
+        self._metrics = {"hits": 0, "near_misses": 0, "misses": 0, "bypassed": 0, "stored": 0}
+
+    def lookup(self, collection_name: str, question_embedding: list[float]) -> str | None:
+        query = _unit(question_embedding)
+        now = time.time()
+
+        with self._lock:
+            entries = [
+                e for e in self._entries.get(collection_name, [])
+                if now - e.created_at < self.ttl_seconds
+            ]
+            if entries:
+                self._entries[collection_name] = entries
+            else:
+                self._entries.pop(collection_name, None)
+
+            best, best_similarity = None, -1.0
+            if entries:
+                similarities = np.stack([e.embedding for e in entries]) @ query
+                i = int(np.argmax(similarities))
+                best, best_similarity = entries[i], float(similarities[i])
+
+            if best and best_similarity >= self.threshold:
+                self._metrics["hits"] += 1
+                return best.answer
+
+            if best and best_similarity >= self.near_miss_threshold:
+                self._metrics["near_misses"] += 1
+                print(f"Answer cache near miss ({best_similarity:.3f}): {best.question!r}")
+            self._metrics["misses"] += 1
+            return None
+
+    def store(self, collection_name: str, question: str, question_embedding: list[float], answer: str):
+        with self._lock:
+            entries = self._entries[collection_name]
+            entries.append(CachedAnswer(
+                question=question,
+                embedding=_unit(question_embedding),
+                answer=answer,
+                created_at=time.time()
+            ))
+            # Oldest first, drop the oldest
+            del entries[:-self.max_per_collection]
+            self._metrics["stored"] += 1
+
+    def record_bypass(self):
+        with self._lock:
+            self._metrics["bypassed"] += 1
+
+    def invalidate(self, collection_name: str):
+        with self._lock:
+            self._entries.pop(collection_name, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._metrics["hits"] + self._metrics["misses"]
+            return {
+                **self._metrics,
+                "hit_rate": self._metrics["hits"] / lookups if lookups else 0.0,
+                "collections": len(self._entries),
+                "entries": sum(len(e) for e in self._entries.values())
+            }
+
+
+def _unit(vector: list[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
+
+answer_cache = SemanticAnswerCache()
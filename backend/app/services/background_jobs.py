@@ -0,0 +1,70 @@
+import itertools
+import queue
+import threading
+import traceback
+from typing import Any, Callable
+
+from core.config import BACKGROUND_JOB_WORKERS, LLM_JOB_WORKERS
+
+# Lower value runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+
+class BackgroundJobQueue:
+    """
+    Priority job queue served by a fixed pool of daemon worker threads.
+
+    Used for work that must not block a request (document ingestion,
+    pre-generation). Jobs of equal priority run in submission order.
+
+    NOTE:
+    - Jobs are NOT persisted, a restart drops queued jobs
+    - Job functions own their resources (e.g. open their own DB session)
+    """
+
+    def __init__(self, workers: int = 2, name: str = "background-job"):
+        self.workers = workers
+        self.name = name
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args, priority: int = PRIORITY_NORMAL, **kwargs):
+        self._ensure_started()
+        self._queue.put((priority, next(self._counter), fn, args, kwargs))
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f"{self.name}-{i}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            _, _, fn, args, kwargs = self._queue.get()
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                # A failing job must not kill the worker, jobs record their own status
+                print(f"Background job {getattr(fn, '__name__', fn)} failed:")
+                traceback.print_exc()
+            finally:
+                self._queue.task_done()
+
+
+background_jobs = BackgroundJobQueue(workers=BACKGROUND_JOB_WORKERS)
+# Summaries and pre-generation make many LLM calls, ingestion is not queued behind them
+llm_jobs = BackgroundJobQueue(workers=LLM_JOB_WORKERS, name="llm-job")
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
-from core.models import Chat, Message
+from core.models import Chat, Message, Document
+from services.vector_lifecycle_service import release_documents
 from uuid import UUID
 from datetime import datetime
 
@@ -23,8 +24,13 @@ def update_chat_timestamp(db: Session, chat_id: UUID):
 def delete_chat(db: Session, chat_id: UUID) -> bool:
     chat = db.query(Chat).filter(Chat.chat_id == chat_id).first()
     if chat:
+        # Document rows go with the chat (ON DELETE CASCADE), their vectors are cleaned up here
+        documents = db.query(Document).filter(Document.chat_id == chat_id).all()
+        for document in documents:
+            db.expunge(document)  # Keep loaded attributes after the rows are gone
         db.delete(chat)
         db.commit()
+        release_documents(db, documents)
         return True
     return False
 
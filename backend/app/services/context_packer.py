@@ -0,0 +1,138 @@
+from typing import Callable
+
+from langchain_core.documents import Document as LCDocument
+from core.config import CONTEXT_TOKEN_BUDGET, CHUNK_OVERLAP
+
+CHARS_PER_TOKEN = 4  # Rough estimate for English text, no tokenizer round trip
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _is_word_boundary(text: str, index: int) -> bool:
+    """True when index falls between two words (or at either end of text)"""
+    if index <= 0 or index >= len(text):
+        return True
+    return not (text[index - 1].isalnum() and text[index].isalnum())
+
+
+def _suffix_prefix_overlap(left: str, right: str, max_overlap: int, min_overlap: int = CHUNK_OVERLAP // 2) -> int:
+    """
+    Length of the longest suffix of left that is a prefix of right, 0 unless
+    it is at least min_overlap characters and starts and ends on word boundaries
+
+    Short matches are coincidence (a shared letter, a common word), not splitter overlap.
+    """
+    for size in range(min(len(left), len(right), max_overlap), min_overlap - 1, -1):
+        if (
+            left.endswith(right[:size])
+            and _is_word_boundary(left, len(left) - size)
+            and _is_word_boundary(right, size)
+        ):
+            return size
+    return 0
+
+
+def _block_key(doc: LCDocument) -> tuple:
+    return (doc.metadata.get("document_id"), doc.metadata.get("source"), doc.metadata.get("page"))
+
+
+def merge_adjacent(docs: list[LCDocument], max_overlap: int = CHUNK_OVERLAP * 2) -> list[dict]:
+    """
+    Merge retrieved chunks that are neighbours in the same page
+
+    Chunks are ordered by their start_index metadata when present, and the text
+    they share (splitter overlap) is kept once. Exact duplicates are dropped.
+
+    Returns:
+        Blocks {"text", "rank", "metadata"}, rank = best rank of the merged chunks
+    """
+    groups: dict[tuple, list[tuple[int, LCDocument]]] = {}
+    seen_texts = set()
+    for rank, doc in enumerate(docs):
+        if doc.page_content in seen_texts:
+            continue
+        seen_texts.add(doc.page_content)
+        groups.setdefault(_block_key(doc), []).append((rank, doc))
+
+    blocks = []
+    for members in groups.values():
+        members.sort(key=lambda item: item[1].metadata.get("start_index", item[0]))
+
+        current = None
+        for rank, doc in members:
+            text = doc.page_content
+            start = doc.metadata.get("start_index")
+
+            if current is not None:
+                if start is not None and current["end"] is not None:
+                    # Offsets known: overlapping or touching ranges are merged exactly
+                    if start <= current["end"]:
+                        overlap = current["end"] - start
+                        if overlap < len(text):
+                            current["text"] += text[overlap:]
+                            current["end"] = start + len(text)
+                        current["rank"] = min(current["rank"], rank)
+                        continue
+                else:
+                    # No offsets (older ingestions): fall back to matching the overlap text,
+                    # chunks without a real overlap stay separate blocks
+                    overlap = _suffix_prefix_overlap(current["text"], text, max_overlap)
+                    if overlap:
+                        current["text"] += text[overlap:]
+                        current["rank"] = min(current["rank"], rank)
+                        continue
+                blocks.append(current)
+
+            current = {
+                "text": text,
+                "rank": rank,
+                "end": start + len(text) if start is not None else None,
+                "metadata": doc.metadata
+            }
+        if current is not None:
+            blocks.append(current)
+
+    blocks.sort(key=lambda block: block["rank"])
+    return [{"text": b["text"], "rank": b["rank"], "metadata": b["metadata"]} for b in blocks]
+
+
+def pack_context(
+    docs: list[LCDocument],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    label: Callable[[dict], str] | None = None,
+    separator: str = "\n\n"
+) -> str:
+    """
+    Build the prompt context from ranked chunks within a token budget
+
+    Adjacent chunks are merged and duplicated overlap removed, then blocks are
+    added in rank order; a block that does not fit is skipped so a smaller,
+    lower ranked one can still use the remaining budget.
+
+    Args:
+        docs: Retrieved chunks, best first
+        token_budget: Estimated tokens the context may use
+        label: Optional header per block, e.g. its source document
+
+    Returns:
+        Context text
+    """
+    parts = []
+    used = 0
+    for block in merge_adjacent(docs):
+        text = block["text"]
+        if label:
+            text = f"{label(block['metadata'])}\n{text}"
+        cost = estimate_tokens(text) + estimate_tokens(separator)
+        if used + cost > token_budget:
+            continue
+        parts.append(text)
+        used += cost
+
+    if not parts and docs:
+        # Always give the model something: the best chunk, truncated to the budget
+        parts.append(docs[0].page_content[:token_budget * CHARS_PER_TOKEN])
+
+    return separator.join(parts)
@@ -1,8 +1,9 @@
 import re
-from langchain_chroma import Chroma
-from langchain_nomic import NomicEmbeddings
-
-VECTOR_DB_DIR = "vectorstore/chroma_db"
+from services.document_service import get_vector_db_for_document, get_collection_name
+from services.summary_service import get_summary_tree
+from services.key_concepts_service import get_key_concepts
+from services.context_packer import CHARS_PER_TOKEN
+from core.config import CONTEXT_TOKEN_BUDGET
 
 
 def validate_collection_name(name: str) -> bool:
@@ -12,21 +13,49 @@ def validate_collection_name(name: str) -> bool:
 
 
 def get_document_chunks(document_id: str, k: int = 15) -> list[str]:
+    """
+    Key concept chunks of a document (shared by flashcards, quizzes and roadmaps)
+
+    Read from the per-document key concepts artifact, so the retrieval
+    runs once per ingestion instead of once per generator call.
+    """
     # Validate document_id before using it as a collection name
     if not validate_collection_name(document_id):
         raise ValueError(f"Invalid collection name: {document_id}. Must match [a-zA-Z0-9._-], and be 3-512 characters.")
 
-    vector_db = Chroma(
-        collection_name=document_id,  # This is now validated
-        embedding_function=NomicEmbeddings(
-            model="nomic-embed-text-v1.5"
-        ),
-        persist_directory=VECTOR_DB_DIR
-    )
+    vector_db = get_vector_db_for_document(document_id)  # This is now validated
+
+    return get_key_concepts(get_collection_name(document_id), vector_db)[:k]
+
 
-    docs = vector_db.similarity_search(
-        "core concepts and key ideas of the document",
-        k=k
-    )
+def get_document_overview(document_id: str, token_budget: int = CONTEXT_TOKEN_BUDGET) -> str | None:
+    """
+    Whole-document summary followed by the section summaries, within token_budget
+    None if the summary tree is not built (yet)
+
+    When the sections do not all fit, each gets an equal share of the
+    remaining budget (truncated), so the overview still covers the whole document.
+    """
+    if not validate_collection_name(document_id):
+        raise ValueError(f"Invalid collection name: {document_id}. Must match [a-zA-Z0-9._-], and be 3-512 characters.")
 
-    return [doc.page_content for doc in docs]
+    tree = get_summary_tree(get_collection_name(document_id))
+    if not tree:
+        return None
+
+    max_chars = token_budget * CHARS_PER_TOKEN
+    overview = ("Document summary:\n" + tree["document"])[:max_chars]
+
+    sections = [
+        f"Pages {section['pages'][0] + 1}-{section['pages'][1] + 1}:\n{section['summary']}"
+        for section in tree["sections"]
+    ]
+    remaining = max_chars - len(overview)
+    if sections and remaining > 0:
+        separator = "\n\n"
+        share = remaining // len(sections) - len(separator)
+        if sum(len(section) + len(separator) for section in sections) > remaining:
+            sections = [section[:share] for section in sections if share > 0]
+        if sections:
+            overview += separator + separator.join(sections)
+    return overview
@@ -1,93 +1,411 @@
+from concurrent.futures import ProcessPoolExecutor
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_chroma import Chroma
-from langchain_nomic import NomicEmbeddings
-from core.config import VECTOR_DB_DIR
+from core.config import (
+    INGESTION_PARSE_WORKERS,
+    INGESTION_PAGES_PER_TASK,
+    INGESTION_PAGES_PER_BATCH,
+    INGESTION_EMBED_BATCH_SIZE,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP
+)
+from core.database import SessionLocal
 from core.models import Document
+from services.background_jobs import background_jobs, llm_jobs, PRIORITY_HIGH, PRIORITY_LOW
+from services.vector_store_service import vector_store, vector_writes, FilteredCollection
+from services.lexical_index import lexical_indexes
+from services.answer_cache import answer_cache
+from services.summary_service import summary_job, get_summary_tree
+from services.key_concepts_service import build_key_concepts, remove_key_concepts
+from utils.pdf_utils import count_pages, iter_page_batches
 from sqlalchemy.orm import Session
+from functools import lru_cache
 from uuid import UUID
+import os
+import multiprocessing
+import threading
 import uuid
 
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+STATUS_EVICTED = "evicted"  # Vectors dropped by the store quota, re-ingested from file_path on demand
 
-def ingest_document(file_path: str, chat_id: UUID, db: Session) -> str:
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+# Serializes the hash lookup + insert so concurrent identical uploads share one ingestion
+_dedupe_lock = threading.Lock()
+
+
+def ingest_document(
+    file_path: str,
+    chat_id: UUID,
+    db: Session,
+    file_name: str | None = None,
+    content_hash: str | None = None
+) -> str:
     """
-    Ingest a PDF document: chunk, embed, store in vector DB and metadata in Neon DB
-    
+    Register a PDF document and queue its ingestion (chunk, embed, store in vector DB)
+
+    Returns immediately, the document stays "pending" until a background
+    worker picks it up. Progress is available via get_ingestion_status.
+    If a document with the same content hash was already uploaded, the new
+    row points at its vector collection and nothing is re-embedded.
+
     Args:
         file_path: Path to the PDF file
         chat_id: UUID of the chat session
         db: SQLAlchemy database session
-    
+        file_name: Original file name (defaults to the stored file name)
+        content_hash: sha256 of the file content, enables deduplication
+
     Returns:
         document_id as string
     """
-    # Load and chunk document
-    loader = PyPDFLoader(file_path)
-    docs = loader.load()
+    # Generate document ID
+    doc_id = str(uuid.uuid4())
 
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=700,
-        chunk_overlap=150
-    )
+    # Extract file metadata
+    if not file_name:
+        file_name = file_path.replace("\\", "/").split("/")[-1]
+    file_type = file_name.split(".")[-1] if "." in file_name else "pdf"
+
+    with _dedupe_lock:
+        existing = find_document_by_hash(db, content_hash) if content_hash else None
 
-    chunks = splitter.split_documents(docs)
+        if existing:
+            # Same content: share the collection (and the stored file) of the first upload
+            if os.path.abspath(existing.file_path) != os.path.abspath(file_path):
+                os.remove(file_path)
+            document = Document(
+                document_id=UUID(doc_id),
+                chat_id=chat_id,
+                file_name=file_name,
+                file_type=file_type,
+                file_path=existing.file_path,
+                storage_url=existing.storage_url,
+                content_hash=content_hash,
+                collection_name=existing.collection_name or str(existing.document_id)
+            )
+        else:
+            # Store metadata in Neon DB
+            document = Document(
+                document_id=UUID(doc_id),
+                chat_id=chat_id,
+                file_name=file_name,
+                file_type=file_type,
+                file_path=file_path,
+                storage_url=None,  # Can add S3/cloud storage URL if needed
+                status=STATUS_PENDING,
+                pages_parsed=0,
+                chunks_embedded=0,
+                content_hash=content_hash
+            )
 
-    # Create embeddings
-    embeddings = NomicEmbeddings(
-        model="nomic-embed-text-v1.5"
+        db.add(document)
+        db.commit()
+
+    if existing:
+        print(f"Document {doc_id} reuses collection {document.collection_name}")
+        return doc_id
+
+    # Interactive uploads go ahead of background pre-generation work
+    background_jobs.submit(run_ingestion, doc_id, priority=PRIORITY_HIGH)
+
+    return doc_id
+
+
+def find_document_by_hash(db: Session, content_hash: str) -> Document | None:
+    """Oldest document with this content whose ingestion did not fail"""
+    return (
+        db.query(Document)
+        .filter(Document.content_hash == content_hash)
+        .filter((Document.status.is_(None)) | (Document.status != STATUS_FAILED))
+        .order_by(Document.created_at)
+        .first()
     )
 
-    # Generate document ID
-    doc_id = str(uuid.uuid4())
 
-    # Store in vector database (Chroma)
-    vector_db = Chroma(
-        collection_name=doc_id,
-        embedding_function=embeddings,
-        persist_directory=VECTOR_DB_DIR
+@lru_cache(maxsize=4096)
+def get_collection_name(doc_id: str) -> str:
+    """
+    Vector collection backing a document (cached, the mapping never changes)
+
+    Deduplicated documents point at the collection of the first upload,
+    all others use their own document_id.
+    """
+    try:
+        document_uuid = UUID(doc_id)
+    except ValueError:
+        return doc_id
+
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(Document.collection_name)
+            .filter(Document.document_id == document_uuid)
+            .first()
+        )
+    finally:
+        db.close()
+    if row and row.collection_name:
+        return row.collection_name
+    return doc_id
+
+
+def run_ingestion(doc_id: str):
+    """
+    Background job: stream pages, chunk and embed them in bounded batches.
+
+    After each batch of pages, a checkpoint (last page embedded) is committed
+    with the progress counters, so a retried job resumes after it and memory
+    stays flat regardless of the book length. Uses its own DB session.
+    Holds the vector store write gate, compaction waits for the next run.
+    """
+    with vector_writes.writing():
+        _ingest(doc_id)
+
+
+def _ingest(doc_id: str):
+    db = SessionLocal()
+    try:
+        document = db.query(Document).filter(Document.document_id == UUID(doc_id)).first()
+        if not document:
+            return
+
+        document.status = STATUS_PROCESSING
+        document.error = None
+        document.pages_total = count_pages(document.file_path)
+        db.commit()
+
+        resume_page = (document.checkpoint_page + 1) if document.checkpoint_page is not None else 0
+        if resume_page:
+            print(f"Resuming ingestion of {doc_id} at page {resume_page}")
+
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+            add_start_index=True  # Offsets within the page, lets the context packer merge neighbours
+        )
+
+        # Store in vector database (Chroma), one embedding call per batch
+        vector_db = vector_store.get_document_store(doc_id)
+
+        batches = iter_page_batches(
+            document.file_path,
+            start_page=resume_page,
+            batch_pages=INGESTION_PAGES_PER_BATCH,
+            executor=_get_parse_pool(),
+            pages_per_task=INGESTION_PAGES_PER_TASK
+        )
+        for pages in batches:
+            chunks = splitter.split_documents(pages)
+            # Deterministic ids (page + position), a re-run overwrites instead of duplicating
+            chunk_ids = _chunk_ids(doc_id, chunks)
+
+            if chunk_ids:
+                # A crash mid-batch may have written part of it already
+                vector_db.delete(ids=chunk_ids)
+            for start in range(0, len(chunks), INGESTION_EMBED_BATCH_SIZE):
+                end = start + INGESTION_EMBED_BATCH_SIZE
+                vector_db.add_documents(chunks[start:end], ids=chunk_ids[start:end])
+
+            document.checkpoint_page = pages[-1].metadata["page"]
+            document.pages_parsed = document.checkpoint_page + 1
+            document.chunks_embedded = (document.chunks_embedded or 0) + len(chunks)
+            db.commit()
+
+        # BM25 index over everything in the store, including chunks from before a resume
+        lexical_indexes.remove(doc_id)
+        lexical_indexes.get(doc_id, vector_db=vector_db)
+
+        # Answers and key concepts of a previous ingestion of this collection are stale
+        answer_cache.invalidate(doc_id)
+        remove_key_concepts(doc_id)
+        build_key_concepts(doc_id, vector_db)
+
+        document.status = STATUS_READY
+        db.commit()
+
+        # Questions can be answered already, the summary tree and the
+        # study artifacts built from it follow in the background
+        llm_jobs.submit(_post_ingestion_job, doc_id, document.file_path, priority=PRIORITY_LOW)
+    except Exception as e:
+        db.rollback()
+        print(f"Ingestion failed for document {doc_id}: {e}")
+        # Checkpoint is kept, retry_ingestion resumes after it
+        db.query(Document).filter(Document.document_id == UUID(doc_id)).update(
+            {"status": STATUS_FAILED, "error": str(e)}
+        )
+        db.commit()
+        raise
+    finally:
+        db.close()
+
+
+def _post_ingestion_job(doc_id: str, file_path: str):
+    """
+    Summary tree, then flashcards, quiz and roadmap, in this order:
+    the generators read the summary, run in parallel they would fall back
+    to raw chunks and store that result for good
+    """
+    if not get_summary_tree(doc_id):
+        summary_job(doc_id, file_path)
+
+    # Imported here, the generators depend on this module
+    from services.study_artifact_service import pregenerate_study_artifacts
+    pregenerate_study_artifacts(doc_id)
+
+
+def retry_ingestion(db: Session, doc_id: str) -> bool:
+    """
+    Queue a failed ingestion again, it resumes from its checkpoint
+
+    Returns:
+        True if the document had failed and was queued
+    """
+    updated = (
+        db.query(Document)
+        .filter(Document.document_id == UUID(doc_id))
+        .filter(Document.status == STATUS_FAILED)
+        .update({"status": STATUS_PENDING})
     )
+    db.commit()
+    if updated:
+        background_jobs.submit(run_ingestion, doc_id, priority=PRIORITY_HIGH)
+    return bool(updated)
 
-    vector_db.add_documents(chunks)
 
-    # Extract file metadata
-    file_name = file_path.split("/")[-1].replace("\\", "/").split("/")[-1]
-    file_type = file_name.split(".")[-1] if "." in file_name else "pdf"
+def resume_interrupted_ingestions():
+    """
+    Re-queue ingestions a previous process left pending or processing
+    (the job queue is in memory), they resume from their checkpoints
+    """
+    db = SessionLocal()
+    try:
+        documents = (
+            db.query(Document.document_id)
+            .filter(Document.status.in_([STATUS_PENDING, STATUS_PROCESSING]))
+            .order_by(Document.created_at)
+            .all()
+        )
+    finally:
+        db.close()
+
+    for row in documents:
+        background_jobs.submit(run_ingestion, str(row.document_id), priority=PRIORITY_HIGH)
+    if documents:
+        print(f"Resuming {len(documents)} interrupted ingestions")
+
 
-    # Store metadata in Neon DB
-    document = Document(
-        document_id=UUID(doc_id),
-        chat_id=chat_id,
-        file_name=file_name,
-        file_type=file_type,
-        file_path=file_path,
-        storage_url=None  # Can add S3/cloud storage URL if needed
+def _chunk_ids(doc_id: str, chunks: list) -> list[str]:
+    ids = []
+    position = {}
+    for chunk in chunks:
+        page = chunk.metadata.get("page", 0)
+        position[page] = position.get(page, -1) + 1
+        ids.append(f"{doc_id}-p{page}-{position[page]}")
+    return ids
+
+
+def restore_document(db: Session, doc_id: str) -> bool:
+    """
+    Queue re-ingestion of an evicted document (or of the document owning its collection)
+
+    Returns:
+        True if a re-ingestion was queued
+    """
+    owner_id = get_collection_name(doc_id)
+    updated = (
+        db.query(Document)
+        .filter(Document.document_id == UUID(owner_id))
+        .filter(Document.status == STATUS_EVICTED)
+        .update({"status": STATUS_PENDING, "pages_parsed": 0, "chunks_embedded": 0, "checkpoint_page": None})
     )
-    
-    db.add(document)
     db.commit()
-    db.refresh(document)
+    if updated:
+        background_jobs.submit(run_ingestion, owner_id, priority=PRIORITY_HIGH)
+    return bool(updated)
 
-    return doc_id
+
+def get_chat_documents(db: Session, chat_id: UUID) -> list[Document]:
+    """Documents uploaded to a chat that can be queried (ingestion finished)"""
+    documents = (
+        db.query(Document)
+        .filter(Document.chat_id == chat_id)
+        .filter((Document.status.is_(None)) | (Document.status == STATUS_READY))
+        .order_by(Document.created_at)
+        .all()
+    )
+    # Deduplicated uploads are only ready once the document owning their collection is
+    return [
+        d for d in documents
+        if not d.collection_name
+        or d.collection_name == str(d.document_id)
+        or is_document_ready(db, str(d.document_id))
+    ]
 
 
-def get_vector_db_for_document(doc_id: str) -> Chroma:
+def get_ingestion_status(db: Session, doc_id: str) -> dict | None:
+    """
+    Ingestion progress of a document
+
+    Returns:
+        dict with status, pages and chunk counters, None if the document does not exist
+    """
+    try:
+        document_uuid = UUID(doc_id)
+    except ValueError:
+        return None
+
+    document = db.query(Document).filter(Document.document_id == document_uuid).first()
+    if not document:
+        return None
+
+    if document.collection_name and document.collection_name != doc_id:
+        # Deduplicated upload: progress is the one of the document that owns the collection
+        owner = db.query(Document).filter(Document.document_id == UUID(document.collection_name)).first()
+        if owner:
+            document = owner
+
+    return {
+        "document_id": doc_id,
+        "status": document.status or STATUS_READY,
+        "pages_total": document.pages_total,
+        "pages_parsed": document.pages_parsed or 0,
+        "chunks_embedded": document.chunks_embedded or 0,
+        "error": document.error
+    }
+
+
+def is_document_ready(db: Session, doc_id: str) -> bool:
+    status = get_ingestion_status(db, doc_id)
+    return status is not None and status["status"] == STATUS_READY
+
+
+def get_vector_db_for_document(doc_id: str) -> Chroma | FilteredCollection:
     """
     Retrieve the vector database for a specific document
-    
+
     Args:
         doc_id: Document UUID as string
-    
+
     Returns:
-        Chroma vector database instance
+        Chroma vector database instance (a filtered view in shared storage mode)
     """
-    embeddings = NomicEmbeddings(
-        model="nomic-embed-text-v1.5"
-    )
-    
-    vector_db = Chroma(
-        collection_name=doc_id,
-        embedding_function=embeddings,
-        persist_directory=VECTOR_DB_DIR
-    )
-    
-    return vector_db
\ No newline at end of file
+    return vector_store.get_document_store(get_collection_name(doc_id))
+
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    # Text extraction is CPU bound pure Python, threads would serialize on the GIL
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # Spawned, not forked: forking this multi-threaded server (threadpool,
+            # Chroma, HTTP pools) can deadlock the child on a lock held by another thread
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=INGESTION_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _parse_pool
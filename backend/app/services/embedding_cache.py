@@ -0,0 +1,213 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+SQLITE_MAX_PARAMS = 500
+
+
+def normalize_text(text: str) -> str:
+    """Case and whitespace insensitive cache key text"""
+    return " ".join(text.split()).casefold()
+
+
+def cache_key(model: str, text: str, normalize: bool = True) -> str:
+    if normalize:
+        text = normalize_text(text)
+    return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by (model, normalized text).
+
+    - In-memory LRU (bounded), plus pinned entries that are never evicted
+    - Optional on-disk tier (SQLite file) that survives restarts
+    """
+
+    def __init__(self, max_entries: int = 4096, disk_path: str | None = None):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._pinned: dict[str, List[float]] = {}
+        self._db = None
+
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> List[float] | None:
+        with self._lock:
+            if key in self._pinned:
+                return self._pinned[key]
+
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                return vector
+
+            if self._db is None:
+                return None
+
+            row = self._db.execute(
+                "SELECT vector FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            vector = _unpack(row[0])
+            self._remember(key, vector)
+            return vector
+
+    def get_many(self, keys: List[str]) -> dict[str, List[float]]:
+        """Cached vectors for the keys that are present, memory first then disk"""
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                if key in self._pinned:
+                    found[key] = self._pinned[key]
+                elif key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                else:
+                    missing.append(key)
+
+            if self._db is None or not missing:
+                return found
+
+            for start in range(0, len(missing), SQLITE_MAX_PARAMS):
+                batch = missing[start:start + SQLITE_MAX_PARAMS]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = _unpack(blob)
+                    self._remember(key, vector)
+                    found[key] = vector
+        return found
+
+    def put_many(self, items: dict[str, List[float]]):
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, _pack(vector)) for key, vector in items.items()]
+                )
+                self._db.commit()
+
+    def put(self, key: str, vector: List[float], persist: bool = True):
+        """Cache a vector, persist=False keeps it in the (bounded) memory tier only"""
+        with self._lock:
+            self._remember(key, vector)
+            if persist and self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    (key, _pack(vector))
+                )
+                self._db.commit()
+
+    def pin(self, key: str, vector: List[float]):
+        with self._lock:
+            self._pinned[key] = vector
+
+    def _remember(self, key: str, vector: List[float]):
+        """Insert into the memory LRU (lock held)"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves repeated embeddings from EmbeddingCaches.
+
+    - Queries: constant retrieval queries can be pinned at startup (warm_up),
+      so they never cost a remote embedding round trip. Only those are
+      written to disk, user questions stay in the bounded memory LRU
+    - Documents: chunks are keyed by their exact text, only cache misses
+      are sent to the provider, in batches of batch_size
+
+    Query and document vectors are cached apart, providers embed
+    them with different task prefixes.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        cache: EmbeddingCache,
+        pinned_queries: list[str] | None = None,
+        document_cache: EmbeddingCache | None = None,
+        batch_size: int = 256
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+        self.pinned_queries = pinned_queries or []
+        self.document_cache = document_cache
+        self.batch_size = batch_size
+
+    def embed_query(self, text: str) -> List[float]:
+        key = cache_key(self.model, text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(key, vector, persist=False)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.document_cache is None:
+            return self.embeddings.embed_documents(texts)
+
+        keys = [cache_key(f"{self.model}/document", text, normalize=False) for text in texts]
+        vectors = self.document_cache.get_many(keys)
+
+        # Unique misses only, repeated chunks within a batch are embedded once
+        misses = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in misses:
+                misses[key] = text
+
+        miss_keys = list(misses)
+        for start in range(0, len(miss_keys), self.batch_size):
+            batch_keys = miss_keys[start:start + self.batch_size]
+            embedded = self.embeddings.embed_documents([misses[key] for key in batch_keys])
+            new_vectors = dict(zip(batch_keys, embedded))
+            self.document_cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        if miss_keys:
+            print(f"Embedded {len(miss_keys)} of {len(texts)} chunks, the rest came from cache")
+
+        return [vectors[key] for key in keys]
+
+    def warm_up(self):
+        for query in self.pinned_queries:
+            key = cache_key(self.model, query)
+            vector = self.cache.get(key) or self.embeddings.embed_query(query)
+            self.cache.put(key, vector)
+            self.cache.pin(key, vector)
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
@@ -0,0 +1,143 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
+from typing import Callable
+
+import numpy as np
+from core.config import (
+    FANOUT_ITEMS_PER_SECTION,
+    FANOUT_MAX_SECTIONS,
+    FANOUT_SECTION_CHARS,
+    FANOUT_CONCURRENCY,
+    FANOUT_DEDUPE_THRESHOLD
+)
+from services.document_service import get_vector_db_for_document
+from services.vector_store_service import vector_store
+
+
+def split_sections(document_id: str, max_sections: int) -> list[str]:
+    """
+    Document chunks in reading order, cut into contiguous sections of similar size
+
+    Returns:
+        One context per section, at most FANOUT_SECTION_CHARS each
+    """
+    stored = get_vector_db_for_document(document_id).get(include=["documents", "metadatas"])
+    chunks = sorted(
+        zip(stored["documents"], stored["metadatas"]),
+        key=lambda chunk: ((chunk[1] or {}).get("page", 0), (chunk[1] or {}).get("start_index", 0))
+    )
+    if not chunks:
+        return []
+
+    section_count = min(max_sections, len(chunks))
+    target_chars = sum(len(text) for text, _ in chunks) / section_count
+
+    sections, current, size = [], [], 0
+    for text, _ in chunks:
+        current.append(text)
+        size += len(text)
+        if size >= target_chars and len(sections) < section_count - 1:
+            sections.append(current)
+            current, size = [], 0
+    if current:
+        sections.append(current)
+
+    return [_sample(texts, FANOUT_SECTION_CHARS) for texts in sections]
+
+
+def _sample(texts: list[str], max_chars: int) -> str:
+    """Chunks spread evenly over the section, so a long section is not cut to its first pages"""
+    total = sum(len(text) for text in texts)
+    if total <= max_chars:
+        return "\n".join(texts)
+    step = math.ceil(total / max_chars)
+    return "\n".join(texts[::step])[:max_chars]
+
+
+def _allocate(count: int, sections: int) -> list[int]:
+    """Items per section, differing by at most one"""
+    base, remainder = divmod(count, sections)
+    return [base + (1 if i < remainder else 0) for i in range(sections)]
+
+
+def dedupe_semantic(
+    items: list[dict],
+    existing_questions: list[str] | None = None,
+    threshold: float = FANOUT_DEDUPE_THRESHOLD
+) -> list[dict]:
+    """
+    Drop items whose question embedding is too close to an earlier (or existing) question
+
+    Items are kept in the given order, falls back to returning them all
+    when the questions cannot be embedded.
+    """
+    existing_questions = existing_questions or []
+    questions = [str(item.get("question", "")) for item in items]
+    # The provider itself, not the caching wrapper: throwaway questions stay out of the on-disk caches
+    embedder = vector_store.embeddings.embeddings
+    try:
+        vectors = np.asarray(embedder.embed_documents(existing_questions + questions), dtype=np.float32)
+    except Exception as e:
+        print(f"Question dedupe skipped, embedding failed: {e}")
+        return items
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1, norms)
+
+    kept_vectors = list(vectors[:len(existing_questions)])
+    unique = []
+    for item, vector in zip(items, vectors[len(existing_questions):]):
+        if kept_vectors and float(np.max(np.stack(kept_vectors) @ vector)) >= threshold:
+            continue
+        kept_vectors.append(vector)
+        unique.append(item)
+    return unique
+
+
+def fan_out_generate(
+    document_id: str,
+    count: int,
+    generate: Callable[..., list],
+    fallback: list,
+    exclude_questions: list[str] | None = None
+) -> list:
+    """
+    Generate count items over the whole document with concurrent per-section prompts
+
+    Each section asks for its share (+1, margin for dedupe). Results are
+    interleaved round robin, so every section is represented before any
+    section contributes a second item, then near-duplicate questions are
+    dropped. Small documents (one section) use a single prompt.
+
+    Args:
+        generate: generate_flashcards / generate_quiz, called with context=section
+        fallback: The generator's placeholder, returned when nothing was generated
+
+    Returns:
+        Up to count items
+    """
+    section_count = min(FANOUT_MAX_SECTIONS, math.ceil(count / FANOUT_ITEMS_PER_SECTION))
+    sections = split_sections(document_id, section_count)
+    if len(sections) <= 1:
+        return generate(document_id, count, exclude_questions=exclude_questions)
+
+    def run(section: str, quota: int) -> list:
+        try:
+            items = generate(document_id, quota + 1, exclude_questions=exclude_questions, context=section)
+        except Exception as e:
+            print(f"Section generation failed for document {document_id}: {e}")
+            return []
+        return [] if items is fallback else items
+
+    quotas = _allocate(count, len(sections))
+    with ThreadPoolExecutor(max_workers=min(FANOUT_CONCURRENCY, len(sections))) as pool:
+        results = list(pool.map(run, sections, quotas))
+
+    interleaved = [item for group in zip_longest(*results) for item in group if item is not None]
+    unique = dedupe_semantic(interleaved, exclude_questions)
+    print(
+        f"Fan-out generation: {len(sections)} sections, {len(interleaved)} items, "
+        f"{len(unique)} after dedupe for document {document_id}"
+    )
+    return unique[:count] or fallback
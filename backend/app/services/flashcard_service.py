@@ -1,17 +1,31 @@
-from services.document_content_service import get_document_chunks
-from langchain_groq import ChatGroq
+from services.document_content_service import get_document_chunks, get_document_overview
+from services.llm_gateway import llm_gateway
+from utils.json_utils import iter_json_objects
+from typing import Iterator
 import json
 
 
-llm = ChatGroq(
-    model="llama-3.3-70b-versatile",
-    temperature=0.3,
+# Returned when the LLM output is not valid JSON, never stored
+FALLBACK_FLASHCARDS = [
+    {
+        "question": "Error generating flashcards",
+        "answer": "Please try again"
+    }
+]
+
+LLM_PROFILE = "flashcards"
 
-)
+# Stored flashcard sets are keyed by these, bump the version when the prompt changes
+FLASHCARD_MODEL = llm_gateway.profile(LLM_PROFILE).model
+FLASHCARD_PROMPT_VERSION = "1"
 
-def generate_flashcards(document_id:str,count :int=10):
-    chunks = get_document_chunks(document_id)
-    context = "\n".join(chunks)
+def _build_prompt(document_id: str, count: int, exclude_questions: list[str] | None, context: str | None = None) -> str:
+    # Summary tree covers the whole document, retrieved chunks only part of it
+    if not context:
+        context = get_document_overview(document_id)
+    if not context:
+        chunks = get_document_chunks(document_id)
+        context = "\n".join(chunks)
 
     prompt = f""" 
 You are an educational assistant.
@@ -26,25 +40,55 @@ Rules:
 [
 {{"question": "...","answer":"..."}}
 ]
-
+{exclusion_rule(exclude_questions)}
 Document content:
 {context}
 
 """
-    
-    response = llm.invoke(prompt)
+    return prompt
+
+
+def is_valid_flashcard(item: dict) -> bool:
+    return bool(item.get("question")) and bool(item.get("answer"))
+
+
+def generate_flashcards(document_id:str,count :int=10, exclude_questions: list[str] | None = None, context: str | None = None):
+    """context: generate from this text (e.g. one section) instead of the document overview"""
+    prompt = _build_prompt(document_id, count, exclude_questions, context)
+    content = llm_gateway.complete(prompt, profile=LLM_PROFILE)
     
     # Parse the JSON response
     try:
-        data = json.loads(response.content)
+        data = json.loads(content)
         return data
     except json.JSONDecodeError as e:
         print(f"Failed to parse flashcard JSON: {e}")
-        print(f"Raw response: {response.content}")
+        # Keep the complete cards before a malformed or truncated tail
+        salvaged = [item for item in iter_json_objects([content]) if is_valid_flashcard(item)]
+        if salvaged:
+            print(f"Salvaged {len(salvaged)} flashcards from malformed output")
+            return salvaged
+        print(f"Raw response: {content}")
         # Return fallback data
-        return [
-            {
-                "question": "Error generating flashcards",
-                "answer": "Please try again"
-            }
-        ]
\ No newline at end of file
+        return FALLBACK_FLASHCARDS
+
+
+def stream_flashcards(document_id: str, count: int = 10, exclude_questions: list[str] | None = None) -> Iterator[dict]:
+    """
+    Yield each flashcard as soon as the LLM closes its JSON object
+
+    Invalid objects are skipped, the cards streamed before a malformed tail are kept.
+    """
+    prompt = _build_prompt(document_id, count, exclude_questions)
+    tokens = llm_gateway.stream(prompt, profile=LLM_PROFILE)
+    for item in iter_json_objects(tokens):
+        if is_valid_flashcard(item):
+            yield item
+
+
+def exclusion_rule(exclude_questions: list[str] | None) -> str:
+    """Prompt lines for topping up an existing set without repeating it"""
+    if not exclude_questions:
+        return ""
+    existing = "\n".join(f"- {q}" for q in exclude_questions)
+    return f"\nThese questions already exist, do NOT repeat or rephrase them:\n{existing}\n"
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Any, Set, Tuple
+
+
+TERMINAL_EVENTS = {"completed", "failed"}
+
+
+class JobEventBus:
+    """
+    In-process pub/sub for background job events.
+
+    Job workers (threads) publish events for a job id,
+    SSE/WebSocket handlers (event loop) subscribe to them.
+
+    NOTE:
+    - Events are NOT persisted, only the last event per job is kept
+      so that late subscribers immediately get the current state
+    - Works within a single worker process
+    """
+
+    def __init__(self, ttl_seconds: int = 3600):
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._last_events: Dict[str, Dict[str, Any]] = {}
+
+    def publish(self, job_id: str, event: Dict[str, Any]):
+        """Publish an event for a job. Safe to call from any thread."""
+        event = {**event, "job_id": job_id, "timestamp": time.time()}
+
+        with self._lock:
+            self._last_events[job_id] = event
+            subscribers = list(self._subscribers.get(job_id, ()))
+            self._prune()
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # Subscriber's event loop is already closed
+                pass
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Subscribe to a job's events. Must be called from the event loop."""
+        queue: asyncio.Queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            self._subscribers.setdefault(job_id, set()).add((loop, queue))
+            last_event = self._last_events.get(job_id)
+
+        if last_event:
+            queue.put_nowait(last_event)
+
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(job_id)
+            if not subscribers:
+                return
+            subscribers.difference_update({s for s in subscribers if s[1] is queue})
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def last_event(self, job_id: str) -> Dict[str, Any] | None:
+        with self._lock:
+            return self._last_events.get(job_id)
+
+    def _prune(self):
+        """Drop the state of finished jobs nobody listens to anymore (lock held)."""
+        now = time.time()
+        expired = [
+            job_id for job_id, event in self._last_events.items()
+            if event["type"] in TERMINAL_EVENTS
+            and now - event["timestamp"] > self.ttl
+            and job_id not in self._subscribers
+        ]
+        for job_id in expired:
+            del self._last_events[job_id]
+
+
+job_events = JobEventBus()
@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from core.config import (
+    KEY_CONCEPTS_DIR,
+    KEY_CONCEPTS_K,
+    KEY_CONCEPTS_FETCH_K,
+    KEY_CONCEPTS_CACHE_SIZE,
+    CONCEPTS_QUERY
+)
+
+_lock = threading.Lock()
+_cache: "OrderedDict[str, list[str]]" = OrderedDict()
+
+
+def concepts_path(collection_name: str) -> str:
+    return os.path.join(KEY_CONCEPTS_DIR, f"{collection_name}.json")
+
+
+def build_key_concepts(collection_name: str, vector_db) -> list[str]:
+    """
+    Select the chunks that cover the document's key concepts and store them
+
+    Max marginal relevance over the concepts query: relevant chunks that are
+    also different from each other, instead of k near-duplicates of one topic.
+    """
+    docs = vector_db.max_marginal_relevance_search(
+        CONCEPTS_QUERY,
+        k=KEY_CONCEPTS_K,
+        fetch_k=KEY_CONCEPTS_FETCH_K
+    )
+    chunks = [doc.page_content for doc in docs]
+
+    os.makedirs(KEY_CONCEPTS_DIR, exist_ok=True)
+    tmp_path = concepts_path(collection_name) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"chunks": chunks}, f)
+    os.replace(tmp_path, concepts_path(collection_name))
+
+    _remember(collection_name, chunks)
+    return chunks
+
+
+def get_key_concepts(collection_name: str, vector_db) -> list[str]:
+    """
+    Key concept chunks of a collection: memory, then disk, built on first use
+    for documents ingested before the artifact existed
+    """
+    with _lock:
+        chunks = _cache.get(collection_name)
+        if chunks is not None:
+            _cache.move_to_end(collection_name)
+            return chunks
+
+    path = concepts_path(collection_name)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            chunks = json.load(f)["chunks"]
+        _remember(collection_name, chunks)
+        return chunks
+
+    return build_key_concepts(collection_name, vector_db)
+
+
+def remove_key_concepts(collection_name: str):
+    """Invalidate, e.g. before the collection is re-ingested or deleted"""
+    with _lock:
+        _cache.pop(collection_name, None)
+    if os.path.exists(concepts_path(collection_name)):
+        os.remove(concepts_path(collection_name))
+
+
+def _remember(collection_name: str, chunks: list[str]):
+    with _lock:
+        _cache[collection_name] = chunks
+        _cache.move_to_end(collection_name)
+        while len(_cache) > KEY_CONCEPTS_CACHE_SIZE:
+            _cache.popitem(last=False)
@@ -0,0 +1,146 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+from langchain_core.documents import Document as LCDocument
+from core.config import LEXICAL_INDEX_DIR, LEXICAL_INDEX_CACHE_SIZE
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Only the most frequent function words, exact terms are what BM25 is here for
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in",
+    "is", "it", "of", "on", "or", "that", "the", "this", "to", "was", "what",
+    "when", "where", "which", "who", "why", "with"
+}
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index over the chunks of one collection.
+
+    Chunks are stored with their vector store ids, so lexical hits
+    can be fused with vector hits by id.
+    """
+
+    def __init__(self, chunks: list[dict], k1: float = 1.5, b: float = 0.75):
+        # chunks: [{"id": ..., "text": ..., "metadata": {...}}]
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+
+        self.postings: dict[str, dict[int, int]] = defaultdict(dict)
+        self.doc_lengths: list[int] = []
+        for i, chunk in enumerate(chunks):
+            tokens = tokenize(chunk["text"])
+            self.doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings[term][i] = tf
+
+        self.avg_doc_length = (sum(self.doc_lengths) / len(chunks)) if chunks else 0.0
+
+    def search(self, query: str, k: int = 8) -> list[tuple[LCDocument, float]]:
+        """Top k chunks by BM25 score, best first"""
+        n = len(self.chunks)
+        scores: dict[int, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[i] / self.avg_doc_length)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self._to_document(i), score) for i, score in best]
+
+    def _to_document(self, i: int) -> LCDocument:
+        chunk = self.chunks[i]
+        return LCDocument(id=chunk["id"], page_content=chunk["text"], metadata=chunk.get("metadata") or {})
+
+
+class LexicalIndexStore:
+    """
+    BM25 indexes persisted as JSON next to the vector collections,
+    one file per collection, with a bounded LRU of loaded indexes.
+    """
+
+    def __init__(self, index_dir: str = LEXICAL_INDEX_DIR, max_indexes: int = LEXICAL_INDEX_CACHE_SIZE):
+        self.index_dir = index_dir
+        self.max_indexes = max_indexes
+        self._lock = threading.Lock()
+        self._indexes: "OrderedDict[str, BM25Index]" = OrderedDict()
+
+    def path(self, collection_name: str) -> str:
+        return os.path.join(self.index_dir, f"{collection_name}.json")
+
+    def build(self, collection_name: str, ids: list[str], documents: list[LCDocument]) -> BM25Index:
+        """Build and persist the index of a collection (replaces an existing one)"""
+        chunks = [
+            {"id": chunk_id, "text": doc.page_content, "metadata": doc.metadata}
+            for chunk_id, doc in zip(ids, documents)
+        ]
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_path = self.path(collection_name) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"chunks": chunks}, f)
+        os.replace(tmp_path, self.path(collection_name))
+
+        index = BM25Index(chunks)
+        self._remember(collection_name, index)
+        return index
+
+    def get(self, collection_name: str, vector_db=None) -> BM25Index | None:
+        """
+        Loaded index of a collection. Collections ingested before lexical
+        indexing are backfilled from the vector store when vector_db is given.
+        """
+        with self._lock:
+            index = self._indexes.get(collection_name)
+            if index is not None:
+                self._indexes.move_to_end(collection_name)
+                return index
+
+        path = self.path(collection_name)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                index = BM25Index(json.load(f)["chunks"])
+            self._remember(collection_name, index)
+            return index
+
+        if vector_db is None:
+            return None
+
+        stored = vector_db.get(include=["documents", "metadatas"])
+        if not stored["ids"]:
+            return None
+        documents = [
+            LCDocument(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(stored["documents"], stored["metadatas"])
+        ]
+        return self.build(collection_name, stored["ids"], documents)
+
+    def remove(self, collection_name: str):
+        with self._lock:
+            self._indexes.pop(collection_name, None)
+        if os.path.exists(self.path(collection_name)):
+            os.remove(self.path(collection_name))
+
+    def _remember(self, collection_name: str, index: BM25Index):
+        with self._lock:
+            self._indexes[collection_name] = index
+            self._indexes.move_to_end(collection_name)
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+
+
+lexical_indexes = LexicalIndexStore()
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import httpx
+from groq import (
+    Groq,
+    APIConnectionError,
+    InternalServerError,
+    RateLimitError
+)
+from core.config import (
+    settings,
+    LLM_PROFILES,
+    LLM_POOL_MAX_CONNECTIONS,
+    LLM_POOL_MAX_KEEPALIVE,
+    LLM_DEFAULT_TIMEOUT_SECONDS,
+    LLM_MAX_RETRIES,
+    LLM_BACKOFF_BASE_SECONDS,
+    LLM_BACKOFF_MAX_SECONDS
+)
+
+# Rate limits, 5xx, timeouts and dropped connections are worth another attempt
+RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+
+
+@dataclass(frozen=True)
+class LLMProfile:
+    model: str
+    temperature: float = 0.2
+    max_tokens: int | None = None
+    timeout: float = LLM_DEFAULT_TIMEOUT_SECONDS
+    max_retries: int = LLM_MAX_RETRIES
+    system_prompt: str | None = None
+    coalesce: bool = True
+
+
+@dataclass
+class _Flight:
+    """One in-flight request, callers with the same prompt wait for its result"""
+    done: threading.Event = field(default_factory=threading.Event)
+    result: str | None = None
+    error: Exception | None = None
+
+
+class LLMGateway:
+    """
+    Single entry point for LLM calls.
+
+    Owns ONE Groq client on a pooled HTTP connection pool, so every
+    service reuses open connections. Callers are synchronous (services run
+    in worker threads or FastAPI's threadpool), calls block the calling thread.
+    Call sites pick a profile (model, temperature, limits, timeout);
+    retries use exponential backoff with full jitter, and calls,
+    retries, errors, latency and tokens are counted per profile.
+
+    Single flight: concurrent complete calls with the same
+    (model, messages, params) share one upstream request. On by default,
+    off for profiles with coalesce=False or per call with coalesce=False.
+    """
+
+    def __init__(self, profiles: dict[str, dict] = LLM_PROFILES):
+        self.profiles = {name: LLMProfile(**config) for name, config in profiles.items()}
+
+        self._lock = threading.Lock()
+        self._client: Groq | None = None
+        self._metrics: dict[str, dict] = {}
+        self._flights: dict[str, _Flight] = {}
+
+    @property
+    def client(self) -> Groq:
+        with self._lock:
+            if self._client is None:
+                self._client = Groq(
+                    api_key=settings.GROQ_API_KEY,
+                    max_retries=0,  # Retried here, with jitter and metrics
+                    http_client=httpx.Client(limits=self._limits())
+                )
+            return self._client
+
+    def profile(self, name: str) -> LLMProfile:
+        if name not in self.profiles:
+            raise ValueError(f"Unknown LLM profile: {name}")
+        return self.profiles[name]
+
+    def complete(self, prompt: str, profile: str, coalesce: bool | None = None) -> str:
+        """
+        Blocking completion, call from sync code or a worker thread (never from an async handler)
+
+        Args:
+            coalesce: Override the profile's single-flight setting for this call
+        """
+        config = self.profile(profile)
+        if not self._coalesces(config, coalesce):
+            return self._complete(prompt, profile, config)
+
+        key = self._flight_key(config, prompt)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self._metrics_of(profile)["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._complete(prompt, profile, config)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.result
+
+    def _complete(self, prompt: str, profile: str, config: LLMProfile) -> str:
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(**self._request(config, prompt))
+            except RETRYABLE_ERRORS as e:
+                if attempt >= config.max_retries:
+                    self._record(profile, started, error=True)
+                    raise
+                attempt += 1
+                self._record_retry(profile, e)
+                time.sleep(self._backoff(attempt))
+                continue
+            except Exception:
+                self._record(profile, started, error=True)
+                raise
+
+            self._record(profile, started, usage=response.usage)
+            return response.choices[0].message.content or ""
+
+    def stream(self, prompt: str, profile: str) -> Iterator[str]:
+        """
+        Yield the completion text as it is generated
+
+        Only opening the stream is retried, once text was yielded a
+        failure is raised to the caller (who may keep what it got).
+        """
+        config = self.profile(profile)
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                chunks = self.client.chat.completions.create(**self._request(config, prompt), stream=True)
+                break
+            except RETRYABLE_ERRORS as e:
+                if attempt >= config.max_retries:
+                    self._record(profile, started, error=True)
+                    raise
+                attempt += 1
+                self._record_retry(profile, e)
+                time.sleep(self._backoff(attempt))
+            except Exception:
+                self._record(profile, started, error=True)
+                raise
+
+        usage, failed = None, False
+        try:
+            for chunk in chunks:
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                    usage = x_groq.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception:
+            failed = True
+            raise
+        finally:
+            # Also reached when the consumer stops early, the connection goes back to the pool
+            chunks.close()
+            self._record(profile, started, usage=usage, error=failed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    **metrics,
+                    "avg_latency_seconds": metrics["latency_seconds"] / metrics["calls"] if metrics["calls"] else 0.0
+                }
+                for name, metrics in self._metrics.items()
+            }
+
+    def _coalesces(self, config: LLMProfile, coalesce: bool | None) -> bool:
+        return config.coalesce if coalesce is None else coalesce
+
+    def _flight_key(self, config: LLMProfile, prompt: str) -> str:
+        request = self._request(config, prompt)
+        request.pop("timeout")
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _request(self, config: LLMProfile, prompt: str) -> dict:
+        messages = [{"role": "user", "content": prompt}]
+        if config.system_prompt:
+            messages.insert(0, {"role": "system", "content": config.system_prompt})
+        request = {
+            "model": config.model,
+            "messages": messages,
+            "temperature": config.temperature,
+            "timeout": config.timeout
+        }
+        if config.max_tokens:
+            request["max_tokens"] = config.max_tokens
+        return request
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=LLM_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_POOL_MAX_KEEPALIVE
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+    def _metrics_of(self, profile: str) -> dict:
+        return self._metrics.setdefault(profile, {
+            "calls": 0,
+            "errors": 0,
+            "retries": 0,
+            "coalesced": 0,  # Calls answered by another caller's request
+            "latency_seconds": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0
+        })
+
+    def _record(self, profile: str, started: float, usage=None, error: bool = False):
+        with self._lock:
+            metrics = self._metrics_of(profile)
+            metrics["calls"] += 1
+            metrics["latency_seconds"] += time.perf_counter() - started
+            if error:
+                metrics["errors"] += 1
+            if usage is not None:
+                metrics["prompt_tokens"] += usage.prompt_tokens or 0
+                metrics["completion_tokens"] += usage.completion_tokens or 0
+
+    def _record_retry(self, profile: str, error: Exception):
+        with self._lock:
+            self._metrics_of(profile)["retries"] += 1
+        print(f"LLM call ({profile}) failed, retrying: {error}")
+
+
+llm_gateway = LLMGateway()
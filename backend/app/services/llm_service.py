@@ -1,19 +1,13 @@
-from groq import Groq
-from core.config import settings
+from services.llm_gateway import LLMGateway, llm_gateway
 
 
 class LLMService:
-    def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+    """Game services' LLM access, a thin wrapper over the shared gateway"""
 
-    def complete(self, prompt: str) -> str:
-        response = self.client.chat.completions.create(
-            model="openai/gpt-oss-120b",
-            messages=[
-                {"role": "system", "content": "You are a strict evaluator. Return JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2
-        )
+    def __init__(self, gateway: LLMGateway = llm_gateway, profile: str = "play", coalesce: bool | None = None):
+        self.gateway = gateway
+        self.profile = profile
+        self.coalesce = coalesce  # None: the profile decides (off for play)
 
-        return response.choices[0].message.content
+    def complete(self, prompt: str) -> str:
+        return self.gateway.complete(prompt, profile=self.profile, coalesce=self.coalesce)
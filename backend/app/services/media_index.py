@@ -0,0 +1,95 @@
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict
+
+from core.config import OUTPUT_VIDEO_DIR
+from utils.file_utils import find_sadtaker_video
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class MediaEntry:
+    path: str
+    size: int
+    mtime: float
+    etag: str
+
+
+class MediaIndex:
+    """
+    In-memory index of finished job artifacts: job_id -> file, size and content ETag.
+
+    Entries are registered when a job completes, so serving a video
+    does not scan the job directory or hash the file per request.
+    Jobs finished before this process started are indexed on first lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, MediaEntry] = {}
+
+    def register(self, job_id: str, path: str) -> MediaEntry:
+        stat = os.stat(path)
+        entry = MediaEntry(
+            path=path,
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            etag=f'"{_hash_file(path)}"'
+        )
+        with self._lock:
+            self._entries[job_id] = entry
+        return entry
+
+    def lookup(self, job_id: str) -> MediaEntry | None:
+        with self._lock:
+            entry = self._entries.get(job_id)
+
+        if entry:
+            try:
+                stat = os.stat(entry.path)
+            except OSError:
+                self.remove(job_id)
+                return None
+            # Artifacts are immutable, a changed file means it was regenerated
+            if stat.st_size == entry.size and stat.st_mtime == entry.mtime:
+                return entry
+            return self.register(job_id, entry.path)
+
+        job_dir = os.path.join(OUTPUT_VIDEO_DIR, job_id)
+        if not os.path.isdir(job_dir):
+            return None
+
+        video_path = find_sadtaker_video(job_dir)
+        if not video_path:
+            return None
+
+        return self.register(job_id, video_path)
+
+    def remove(self, job_id: str):
+        with self._lock:
+            self._entries.pop(job_id, None)
+
+
+def _hash_file(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Evaluate an If-None-Match header against a strong ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+media_index = MediaIndex()
@@ -15,8 +15,8 @@ class CompleteMissingLinkService:
     Core logic for Complete-the-Missing-Link Play game.
     """
 
-    def __init__(self):
-        self.llm = LLMService()
+    def __init__(self, llm: LLMService | None = None):
+        self.llm = llm or LLMService()
         self.session_store = SessionStore()
 
     # --------------------------------------------------
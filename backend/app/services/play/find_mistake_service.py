@@ -15,8 +15,8 @@ class FindMistakeService:
     Core logic for Find-the-Mistake Play game.
     """
 
-    def __init__(self):
-        self.llm = LLMService()
+    def __init__(self, llm: LLMService | None = None):
+        self.llm = llm or LLMService()
         self.session_store = SessionStore()
 
     # --------------------------------------------------
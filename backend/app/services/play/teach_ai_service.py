@@ -8,8 +8,8 @@ from services.learning_context_service import load_learning_context
 
 
 class TeachAIService:
-    def __init__(self):
-        self.llm = LLMService()
+    def __init__(self, llm: LLMService | None = None):
+        self.llm = llm or LLMService()
 
     # -------------------------------------------------
     # 1️⃣ LLM INITIATES THE CONVERSATION
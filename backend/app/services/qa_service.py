@@ -1,19 +1,17 @@
-from langchain_chroma import Chroma
-from langchain_nomic import NomicEmbeddings
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
-from core.config import VECTOR_DB_DIR
 from services.vision_service import extract_text_from_image
+from services.llm_gateway import llm_gateway
+from services.vector_store_service import vector_store
+from services.document_service import get_vector_db_for_document, get_collection_name
+from services.answer_cache import answer_cache, is_conversation_dependent
+from services.document_content_service import get_document_overview
+from services.context_packer import pack_context
+from services.retrieval_service import hybrid_search, multi_document_search
+from core.config import SUMMARY_QUERY
 
 load_dotenv()
 
-llm = ChatGroq(
-    model="llama-3.3-70b-versatile",
-    temperature=0.2,
-    max_tokens=512,
-    timeout=30,
-    max_retries=2,
-)
+LLM_PROFILE = "qa"
 
 
 SUMMARY_KEYWORDS = [
@@ -47,8 +45,7 @@ Text:
 
 Question:
 """
-    response = llm.invoke(prompt)
-    return response.content.strip()
+    return llm_gateway.complete(prompt, profile=LLM_PROFILE).strip()
 
 
 def build_llm_messages(context: list[dict], current_question: str) -> str:
@@ -112,46 +109,42 @@ def answer_ques(
     if context:
         conversation_history = build_llm_messages(context, question)
 
+    # Answers about a document are shared between users, unless they are follow-ups
+    cache_key = None
+    if document_id:
+        if is_conversation_dependent(question, context):
+            answer_cache.record_bypass()
+        else:
+            question_embedding = vector_store.embeddings.embed_query(question)
+            cache_key = (get_collection_name(document_id), question_embedding)
+            cached = answer_cache.lookup(*cache_key)
+            if cached:
+                return cached
+
     # RAG: Document-based answering
     if document_id:
-        vector_db = Chroma(
-            collection_name=document_id,
-            embedding_function=NomicEmbeddings(
-                model="nomic-embed-text-v1.5",
-            ),
-            persist_directory=VECTOR_DB_DIR,
-        )
-
-        retrieval_query = (
-            "summary of the document"
-            if is_summary
-            else question
-        )
-
-        docs_with_score = vector_db.similarity_search_with_score(
-            retrieval_query,
-            k=12
-        )
-
-        for _, score in docs_with_score:
-            print("Similarity score:", score)
-
-        print("Collection:", document_id)
-        print("DB path:", VECTOR_DB_DIR)
-        print("Docs retrieved:", len(docs_with_score))
+        # Summary questions read the precomputed summary tree, covering the whole document
+        overview = get_document_overview(document_id) if is_summary else None
 
-        if is_summary:
-            docs = [doc for doc, _ in docs_with_score]
+        if overview:
+            doc_context = overview
         else:
-            docs = [
-                doc for doc, score in docs_with_score
-                if score < 0.6
-            ]
+            if is_summary:
+                # Tree not built yet: broad coverage, no relevance cutoff and no lexical match
+                vector_db = get_vector_db_for_document(document_id)
+                docs = vector_db.similarity_search(SUMMARY_QUERY, k=12)
+            else:
+                docs = hybrid_search(document_id, question)
+
+            print("Collection:", document_id)
+            print("DB path:", vector_store.persist_directory)
+            print("Docs retrieved:", len(docs))
 
-        if not docs:
-            return "I don't know."
+            if not docs:
+                return "I don't know."
 
-        doc_context = "\n".join(doc.page_content for doc in docs)
+            # Adjacent chunks merged, overlap kept once, bounded by the token budget
+            doc_context = pack_context(docs)
 
         # Build prompt based on summary or specific question
         if is_summary:
@@ -221,5 +214,67 @@ Question:
 Answer:
 """
 
-    response = llm.invoke(prompt)
-    return response.content.strip()
\ No newline at end of file
+    answer = llm_gateway.complete(prompt, profile=LLM_PROFILE).strip()
+
+    if cache_key and answer != "I don't know.":
+        answer_cache.store(cache_key[0], question, cache_key[1], answer)
+
+    return answer
+
+
+def answer_from_documents(
+        question: str,
+        documents: dict[str, str],
+        context: list[dict] | None = None
+) -> dict:
+    """
+    Answer a question from all documents of a chat with one retrieval fan-out and ONE LLM call
+
+    Args:
+        question: User's question
+        documents: document_id -> file name of the documents to search
+        context: Conversation history [{"role": "user/assistant", "content": "..."}]
+
+    Returns:
+        {"answer": ..., "sources": [{"document_id": ..., "file_name": ...}]}
+    """
+    docs = multi_document_search(list(documents), question)
+    if not docs:
+        return {"answer": "I don't know.", "sources": []}
+
+    # Sources in order of their best chunk
+    source_ids = list(dict.fromkeys(doc.metadata["document_id"] for doc in docs))
+    doc_context = pack_context(
+        docs,
+        label=lambda metadata: f"[Source: {documents[metadata['document_id']]}]"
+    )
+
+    conv_prefix = ""
+    if context:
+        conv_prefix = f"Previous conversation:\n{build_llm_messages(context, question)}\n\n"
+
+    prompt = f"""
+You are an educational assistant.
+Answer the question ONLY using the context below, which comes from several documents.
+Each part of the context starts with the name of its source document.
+Mention the source document names your answer relies on.
+If the answer is not present in the context, reply with:
+"I don't know."
+
+{conv_prefix}Context:
+{doc_context}
+
+Question:
+{question}
+
+Answer:
+"""
+
+    answer = llm_gateway.complete(prompt, profile=LLM_PROFILE).strip()
+    return {
+        "answer": answer,
+        "sources": [
+            {"document_id": doc_id, "file_name": documents[doc_id]}
+            for doc_id in source_ids
+        ]
+    }
@@ -1,17 +1,30 @@
 from services.document_content_service import get_document_chunks
-from langchain_groq import ChatGroq
+from services.flashcard_service import exclusion_rule
+from services.llm_gateway import llm_gateway
+from utils.json_utils import iter_json_objects
+from typing import Iterator
 import json
 
 
-llm = ChatGroq(
-    model="llama-3.3-70b-versatile",
-    temperature=0.2
-)
+# Returned when the LLM output is not valid JSON, never stored
+FALLBACK_QUIZ = [
+    {
+        "question": "Error generating quiz",
+        "options": ["A) Please try again", "B) Check document content", "C) Upload a different document", "D) Contact support"],
+        "correct_answer": "A"
+    }
+]
+
+LLM_PROFILE = "quiz"
 
-def generate_quiz(document_id: str, count: int = 5):
-    chunks = get_document_chunks(document_id)
+# Stored quizzes are keyed by these, bump the version when the prompt changes
+QUIZ_MODEL = llm_gateway.profile(LLM_PROFILE).model
+QUIZ_PROMPT_VERSION = "1"
 
-    context = "\n".join(chunks)
+def _build_prompt(document_id: str, count: int, exclude_questions: list[str] | None, context: str | None = None) -> str:
+    if not context:
+        chunks = get_document_chunks(document_id)
+        context = "\n".join(chunks)
 
     prompt = f"""
 You are an educational assistant.
@@ -32,25 +45,47 @@ Rules:
     "correct_answer": "B"
   }}
 ]
-
+{exclusion_rule(exclude_questions)}
 Document content:
 {context}
 """
+    return prompt
+
+
+def is_valid_question(item: dict) -> bool:
+    options = item.get("options")
+    return bool(item.get("question")) and isinstance(options, list) and len(options) >= 2 and bool(item.get("correct_answer"))
 
-    response = llm.invoke(prompt)
+
+def generate_quiz(document_id: str, count: int = 5, exclude_questions: list[str] | None = None, context: str | None = None):
+    """context: generate from this text (e.g. one section) instead of the key concept chunks"""
+    prompt = _build_prompt(document_id, count, exclude_questions, context)
+    content = llm_gateway.complete(prompt, profile=LLM_PROFILE)
     
     # Parse the JSON response
     try:
-        data = json.loads(response.content)
+        data = json.loads(content)
         return data
     except json.JSONDecodeError as e:
         print(f"Failed to parse quiz JSON: {e}")
-        print(f"Raw response: {response.content}")
+        # Keep the complete questions before a malformed or truncated tail
+        salvaged = [item for item in iter_json_objects([content]) if is_valid_question(item)]
+        if salvaged:
+            print(f"Salvaged {len(salvaged)} quiz questions from malformed output")
+            return salvaged
+        print(f"Raw response: {content}")
         # Return fallback data
-        return [
-            {
-                "question": "Error generating quiz",
-                "options": ["A) Please try again", "B) Check document content", "C) Upload a different document", "D) Contact support"],
-                "correct_answer": "A"
-            }
-        ]
\ No newline at end of file
+        return FALLBACK_QUIZ
+
+
+def stream_quiz(document_id: str, count: int = 5, exclude_questions: list[str] | None = None) -> Iterator[dict]:
+    """
+    Yield each question as soon as the LLM closes its JSON object
+
+    Invalid objects are skipped, the questions streamed before a malformed tail are kept.
+    """
+    prompt = _build_prompt(document_id, count, exclude_questions)
+    tokens = llm_gateway.stream(prompt, profile=LLM_PROFILE)
+    for item in iter_json_objects(tokens):
+        if is_valid_question(item):
+            yield item
\ No newline at end of file
@@ -0,0 +1,145 @@
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.documents import Document as LCDocument
+from core.config import (
+    RETRIEVAL_VECTOR_K,
+    RETRIEVAL_LEXICAL_K,
+    RETRIEVAL_TOP_K,
+    RRF_K,
+    VECTOR_SCORE_THRESHOLD,
+    MULTI_DOCUMENT_CONCURRENCY,
+    MULTI_DOCUMENT_VECTOR_WEIGHT
+)
+from services.document_service import get_vector_db_for_document, get_collection_name
+from services.lexical_index import lexical_indexes
+
+
+def reciprocal_rank_fusion(rankings: list[list[LCDocument]], k: int = RRF_K) -> list[LCDocument]:
+    """
+    Fuse ranked lists: score(chunk) = sum over lists of 1 / (k + rank)
+
+    Chunks are matched by vector store id (page content for id-less chunks).
+    """
+    scores: dict[str, float] = {}
+    documents: dict[str, LCDocument] = {}
+
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key, doc)
+
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+def hybrid_search(
+    document_id: str,
+    query: str,
+    top_k: int = RETRIEVAL_TOP_K,
+    vector_k: int = RETRIEVAL_VECTOR_K,
+    lexical_k: int = RETRIEVAL_LEXICAL_K,
+    score_threshold: float = VECTOR_SCORE_THRESHOLD
+) -> list[LCDocument]:
+    """
+    Retrieve chunks of a document with vector + BM25 search fused by RRF
+
+    Vector hits above the distance threshold are dropped as before, lexical
+    hits are kept, so exact terms (formula names, identifiers) are found
+    even when their embedding is not close to the question.
+
+    Args:
+        document_id: Document UUID as string
+        query: User question
+        top_k: Number of fused chunks to return
+
+    Returns:
+        Chunks best first, empty if nothing relevant was found
+    """
+    vector_hits, lexical_hits = search_candidates(
+        document_id, query, vector_k, lexical_k, score_threshold
+    )
+
+    print(f"Hybrid retrieval: {len(vector_hits)} vector / {len(lexical_hits)} lexical hits")
+
+    return reciprocal_rank_fusion(
+        [[doc for doc, _ in vector_hits], [doc for doc, _ in lexical_hits]]
+    )[:top_k]
+
+
+def search_candidates(
+    document_id: str,
+    query: str,
+    vector_k: int = RETRIEVAL_VECTOR_K,
+    lexical_k: int = RETRIEVAL_LEXICAL_K,
+    score_threshold: float = VECTOR_SCORE_THRESHOLD
+) -> tuple[list[tuple[LCDocument, float]], list[tuple[LCDocument, float]]]:
+    """
+    Raw candidates of one document
+
+    Returns:
+        (vector hits with distance under the threshold, BM25 hits with score), best first
+    """
+    vector_db = get_vector_db_for_document(document_id)
+
+    docs_with_score = vector_db.similarity_search_with_score(query, k=vector_k)
+    vector_hits = [(doc, score) for doc, score in docs_with_score if score < score_threshold]
+
+    index = lexical_indexes.get(get_collection_name(document_id), vector_db=vector_db)
+    lexical_hits = index.search(query, k=lexical_k) if index else []
+
+    return vector_hits, lexical_hits
+
+
+def multi_document_search(
+    document_ids: list[str],
+    query: str,
+    top_k: int = RETRIEVAL_TOP_K,
+    vector_weight: float = MULTI_DOCUMENT_VECTOR_WEIGHT
+) -> list[LCDocument]:
+    """
+    Retrieve from several documents concurrently and merge into one global top k
+
+    Scores are normalized before merging:
+    - vector distances come from the same embedding model, so they are
+      comparable across collections and min-max normalized over ALL candidates
+    - BM25 scores depend on each collection's statistics, so they are
+      normalized per document by that document's best score
+    A chunk's score is vector_weight * vector + (1 - vector_weight) * lexical.
+
+    Returns:
+        Chunks best first, each tagged with metadata["document_id"]
+    """
+    if not document_ids:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(MULTI_DOCUMENT_CONCURRENCY, len(document_ids))) as pool:
+        results = list(pool.map(lambda doc_id: search_candidates(doc_id, query), document_ids))
+
+    distances = [score for vector_hits, _ in results for _, score in vector_hits]
+    min_distance = min(distances, default=0.0)
+    distance_range = (max(distances, default=0.0) - min_distance) or 1.0
+
+    scores: dict[tuple[str, str], float] = {}
+    documents: dict[tuple[str, str], LCDocument] = {}
+
+    def add(document_id: str, doc: LCDocument, score: float):
+        key = (document_id, doc.id or doc.page_content)
+        scores[key] = scores.get(key, 0.0) + score
+        if key not in documents:
+            documents[key] = LCDocument(
+                id=doc.id,
+                page_content=doc.page_content,
+                metadata={**doc.metadata, "document_id": document_id}
+            )
+
+    for document_id, (vector_hits, lexical_hits) in zip(document_ids, results):
+        for doc, distance in vector_hits:
+            add(document_id, doc, vector_weight * (1 - (distance - min_distance) / distance_range))
+
+        best_lexical = max((score for _, score in lexical_hits), default=0.0)
+        for doc, score in lexical_hits:
+            if best_lexical > 0:
+                add(document_id, doc, (1 - vector_weight) * score / best_lexical)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    print(f"Multi-document retrieval: {len(scores)} candidates from {len(document_ids)} documents")
+    return [documents[key] for key in ranked]
@@ -1,14 +1,15 @@
-from services.document_content_service import get_document_chunks
-from langchain_groq import ChatGroq
+from services.document_content_service import get_document_chunks, get_document_overview
+from services.llm_gateway import llm_gateway
 from utils.json_utils import extract_json
 from utils.roadmap_utils import normalize_node
 from typing import List, Dict, Any
 import uuid
 
-llm = ChatGroq(
-    model="llama-3.3-70b-versatile",
-    temperature=0.2
-)
+LLM_PROFILE = "roadmap"
+
+# Stored document roadmaps are keyed by these, bump the version when the prompt changes
+ROADMAP_MODEL = llm_gateway.profile(LLM_PROFILE).model
+ROADMAP_PROMPT_VERSION = "1"
 
 
 def compress_syllabus(text: str) -> str:
@@ -30,7 +31,7 @@ Return clean bullet-style text.
 Text:
 {text}
 """
-    return llm.invoke(prompt).content.strip()
+    return llm_gateway.complete(prompt, profile=LLM_PROFILE).strip()
 
 
 def _traverse_and_flatten(
@@ -96,8 +97,10 @@ def generate_roadmap(user_input: str, document_id: str | dict | None = None) ->
     context = user_input
 
     if document_id:
-        chunks = get_document_chunks(document_id, k=15)
-        raw_context = "\n".join(chunks)
+        raw_context = get_document_overview(document_id)
+        if not raw_context:
+            chunks = get_document_chunks(document_id, k=15)
+            raw_context = "\n".join(chunks)
         syllabus_context = compress_syllabus(raw_context)
         if user_input:
             context = f"{syllabus_context}\nAdditional input: {user_input}"
@@ -180,8 +183,8 @@ INPUT CONTENT
 Return ONLY the JSON.
 """
 
-    response = llm.invoke(prompt.strip())
-    roadmap = extract_json(response.content)
+    response = llm_gateway.complete(prompt.strip(), profile=LLM_PROFILE)
+    roadmap = extract_json(response)
 
     if "title" not in roadmap or "children" not in roadmap:
         raise ValueError("Invalid roadmap schema")
@@ -2,10 +2,40 @@ import subprocess
 import uuid
 import os
 import sys
+import json
+import threading
+import time
 from core.config import SADTALKER_DIR, INPUT_IMAGE_DIR, INPUT_AUDIO_DIR, OUTPUT_VIDEO_DIR
+from core.config import COMPOSITE_LAYOUT, COMPOSITE_PRESET, COMPOSITE_THREADS
+from services.job_events import job_events
+from services.media_index import media_index
+from utils.file_utils import find_sadtaker_video
 
+PROGRESS_FILE_NAME = "progress.json"
+HLS_DIR_NAME = "hls"
+HLS_PLAYLIST_NAME = "playlist.m3u8"
 
-def run_sadtalker(image_path: str , audio_path: str,job_id: str)-> None:
+# Bounds for the polling interval suggested to status clients
+MIN_POLL_SECONDS = 2
+MAX_POLL_SECONDS = 30
+
+# How often the job watcher checks the progress file of a running job
+WATCH_INTERVAL_SECONDS = 1.0
+
+
+def run_sadtalker(
+    image_path: str,
+    audio_path: str,
+    job_id: str,
+    main_video: str | None = None,
+    layout: str = COMPOSITE_LAYOUT
+)-> None:
+    """
+    Start a SadTalker job in the background.
+
+    If main_video (e.g. a Manim lesson) is given, the avatar frames are
+    composited with it inside the job, in a single encode.
+    """
     # job_id = str(uuid.uuid4())
     output_dir = os.path.join(OUTPUT_VIDEO_DIR, job_id)
     os.makedirs(output_dir, exist_ok=True)
@@ -16,10 +46,131 @@ def run_sadtalker(image_path: str , audio_path: str,job_id: str)-> None:
         "--driven_audio", audio_path,
         "--source_image", image_path,
         "--result_dir", output_dir,
-        "--enhancer", "gfpgan" 
+        "--enhancer", "gfpgan",
+        "--progress_file", os.path.join(output_dir, PROGRESS_FILE_NAME),
+        "--hls_dir", os.path.join(output_dir, HLS_DIR_NAME)
 
     ]
 
-    subprocess.Popen(cmd, cwd=SADTALKER_DIR,shell=True)
+    if main_video:
+        cmd += [
+            "--composite_with", main_video,
+            "--composite_layout", layout,
+            "--composite_preset", COMPOSITE_PRESET,
+            "--composite_threads", str(COMPOSITE_THREADS)
+        ]
+
+    process = subprocess.Popen(cmd, cwd=SADTALKER_DIR,shell=True)
+
+    job_events.publish(job_id, {"type": "queued", "status": "processing"})
+    threading.Thread(
+        target=_watch_job,
+        args=(job_id, process),
+        daemon=True
+    ).start()
 
     return job_id
+
+
+def _watch_job(job_id: str, process: subprocess.Popen):
+    """
+    Publish progress events for a running SadTalker job until its process exits.
+
+    One watcher per job reads the progress file, so subscribers never touch the disk.
+    """
+    last_progress = None
+    stream_ready = False
+
+    while process.poll() is None:
+        progress = get_job_progress(job_id)
+        if progress and progress != last_progress:
+            job_events.publish(job_id, _progress_event(progress))
+            last_progress = progress
+
+        if not stream_ready and get_playlist_url(job_id):
+            job_events.publish(job_id, {
+                "type": "stream_ready",
+                "status": "processing",
+                "playlist_url": get_playlist_url(job_id)
+            })
+            stream_ready = True
+
+        time.sleep(WATCH_INTERVAL_SECONDS)
+
+    job_dir = os.path.join(OUTPUT_VIDEO_DIR, job_id)
+    video_path = find_sadtaker_video(job_dir) if os.path.isdir(job_dir) else None
+
+    if video_path:
+        # Hash once here so result requests never scan or hash
+        media_index.register(job_id, video_path)
+        job_events.publish(job_id, {
+            "type": "completed",
+            "status": "completed",
+            "url": f"/video/result/{job_id}"
+        })
+    else:
+        progress = get_job_progress(job_id) or {}
+        job_events.publish(job_id, {
+            "type": "failed",
+            "status": "failed",
+            "error": progress.get("error") or f"SadTalker exited with code {process.returncode}"
+        })
+
+
+def _progress_event(progress: dict) -> dict:
+    return {
+        "type": "progress",
+        "status": "processing",
+        "stage": progress.get("stage"),
+        "stage_index": progress.get("stage_index"),
+        "stages_total": progress.get("stages_total"),
+        "frames_done": progress.get("frames_done"),
+        "frames_total": progress.get("frames_total"),
+        "fps": progress.get("fps"),
+        "eta_seconds": progress.get("eta_seconds"),
+        "stage_eta_seconds": progress.get("stage_eta_seconds")
+    }
+
+
+def get_job_progress(job_id: str) -> dict | None:
+    """
+    Read the stage progress persisted by the SadTalker process for a job
+
+    Returns:
+        Progress state (stage, frames_done, frames_total, fps, eta_seconds, ...)
+        or None if the job has not reported yet
+    """
+    progress_path = os.path.join(OUTPUT_VIDEO_DIR, job_id, PROGRESS_FILE_NAME)
+    if not os.path.isfile(progress_path):
+        return None
+
+    try:
+        with open(progress_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # File is replaced atomically, but tolerate a partially copied or corrupt one
+        return None
+
+
+def suggest_poll_interval(progress: dict | None) -> int:
+    """Suggest when a client should poll again, based on the job ETA"""
+    if not progress or progress.get("eta_seconds") is None:
+        return MIN_POLL_SECONDS
+    interval = int(progress["eta_seconds"] / 4)
+    return max(MIN_POLL_SECONDS, min(interval, MAX_POLL_SECONDS))
+
+
+def get_playlist_url(job_id: str) -> str | None:
+    """URL of the progressive HLS preview, once the first segment has been published"""
+    playlist_path = os.path.join(OUTPUT_VIDEO_DIR, job_id, HLS_DIR_NAME, HLS_PLAYLIST_NAME)
+    if not os.path.isfile(playlist_path):
+        return None
+    return f"/video/hls/{job_id}/{HLS_PLAYLIST_NAME}"
+
+
+def get_hls_file(job_id: str, file_name: str) -> str | None:
+    """Resolve a playlist/segment file of a job, rejecting anything outside its hls directory"""
+    if os.path.basename(file_name) != file_name or not file_name.endswith((".m3u8", ".m4s", ".mp4")):
+        return None
+    path = os.path.join(OUTPUT_VIDEO_DIR, job_id, HLS_DIR_NAME, file_name)
+    return path if os.path.isfile(path) else None
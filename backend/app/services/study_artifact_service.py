@@ -0,0 +1,308 @@
+import hashlib
+import json
+from typing import Callable, Iterator
+from uuid import UUID
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from core.database import SessionLocal
+from core.models import StudyArtifact, Document
+from core.config import DEFAULT_FLASHCARD_COUNT, DEFAULT_QUIZ_COUNT, FANOUT_MIN_COUNT
+from services.document_service import get_collection_name, is_document_ready
+from services.flashcard_service import (
+    generate_flashcards,
+    stream_flashcards,
+    is_valid_flashcard,
+    FALLBACK_FLASHCARDS,
+    FLASHCARD_PROMPT_VERSION,
+    FLASHCARD_MODEL
+)
+from services.quiz_service import (
+    generate_quiz,
+    stream_quiz,
+    is_valid_question,
+    FALLBACK_QUIZ,
+    QUIZ_PROMPT_VERSION,
+    QUIZ_MODEL
+)
+from services.roadmap_service import generate_roadmap, ROADMAP_PROMPT_VERSION, ROADMAP_MODEL
+from services.fanout_generation_service import fan_out_generate
+
+KIND_FLASHCARDS = "flashcards"
+KIND_QUIZ = "quiz"
+KIND_ROADMAP = "roadmap"
+
+# (prompt_version, model) each kind is generated with, part of the artifact key
+GENERATOR_VERSIONS = {
+    KIND_FLASHCARDS: (FLASHCARD_PROMPT_VERSION, FLASHCARD_MODEL),
+    KIND_QUIZ: (QUIZ_PROMPT_VERSION, QUIZ_MODEL),
+    KIND_ROADMAP: (ROADMAP_PROMPT_VERSION, ROADMAP_MODEL),
+}
+
+
+def _artifact_owner_id(db: Session, document_id: str) -> UUID:
+    """
+    Document row the artifacts of a collection hang off: the oldest row still
+    using the collection. That is the collection's owner, or, once the owner row
+    was deleted (its chat removed), the oldest deduplicated upload left.
+    Artifacts are deleted with that row and regenerated for the next one.
+    """
+    collection_name = get_collection_name(document_id)
+    filters = [Document.collection_name == collection_name]
+    try:
+        filters.append(Document.document_id == UUID(collection_name))
+    except ValueError:
+        pass
+    row = (
+        db.query(Document.document_id)
+        .filter(or_(*filters))
+        .order_by(Document.created_at.asc())
+        .first()
+    )
+    return row.document_id if row else UUID(document_id)
+
+
+def get_artifact(db: Session, document_id: str, kind: str) -> StudyArtifact | None:
+    """
+    Stored artifact of a document for the current prompt version and model
+    (shared by deduplicated uploads of the same content)
+    """
+    prompt_version, model = GENERATOR_VERSIONS[kind]
+    return (
+        db.query(StudyArtifact)
+        .filter(StudyArtifact.document_id == _artifact_owner_id(db, document_id))
+        .filter(StudyArtifact.kind == kind)
+        .filter(StudyArtifact.prompt_version == prompt_version)
+        .filter(StudyArtifact.model == model)
+        .order_by(StudyArtifact.updated_at.desc())
+        .first()
+    )
+
+
+def save_artifact(db: Session, document_id: str, kind: str, data, item_count: int | None = None) -> StudyArtifact:
+    """Store (or replace) the artifact of a document, rows of older prompt versions or models are dropped"""
+    prompt_version, model = GENERATOR_VERSIONS[kind]
+    owner_id = _artifact_owner_id(db, document_id)
+
+    artifact = get_artifact(db, document_id, kind)
+    if artifact:
+        artifact.data = data
+        artifact.item_count = item_count
+    else:
+        artifact = StudyArtifact(
+            document_id=owner_id,
+            kind=kind,
+            item_count=item_count,
+            prompt_version=prompt_version,
+            model=model,
+            data=data
+        )
+        db.add(artifact)
+
+    db.query(StudyArtifact).filter(
+        StudyArtifact.document_id == owner_id,
+        StudyArtifact.kind == kind,
+        (StudyArtifact.prompt_version.is_distinct_from(prompt_version))
+        | (StudyArtifact.model.is_distinct_from(model))
+    ).delete(synchronize_session=False)
+
+    db.commit()
+    db.refresh(artifact)
+    return artifact
+
+
+def _require_ready(db: Session, document_id: str):
+    """Generating from a partial (or evicted) collection would store an incomplete artifact for good"""
+    if not is_document_ready(db, document_id):
+        raise ValueError(f"Document {document_id} is not ready, nothing is generated")
+
+
+def _question_key(item: dict) -> str:
+    return " ".join(str(item.get("question", "")).lower().split())
+
+
+def _validated(generate: Callable[..., list], fallback: list, is_valid: Callable[[dict], bool]) -> Callable[..., list]:
+    """
+    Wrap a generator so it returns only well-formed items, or fallback when none are left
+
+    The model may answer with an object instead of an array, or with items
+    missing fields; neither may end up in a stored set.
+    """
+    def generate_valid(*args, **kwargs) -> list:
+        result = generate(*args, **kwargs)
+        if result is fallback or not isinstance(result, list):
+            return fallback
+        items = [item for item in result if isinstance(item, dict) and is_valid(item)]
+        return items or fallback
+
+    return generate_valid
+
+
+def _get_or_generate_set(
+    db: Session,
+    document_id: str,
+    kind: str,
+    count: int,
+    refresh: bool,
+    generate: Callable[..., list],
+    fallback: list,
+    is_valid: Callable[[dict], bool]
+) -> list:
+    """
+    One growing set of items per document, requests for fewer items get a prefix
+
+    When more items are asked for than stored, only the missing ones are
+    generated (told which questions exist) and appended to the set.
+    FANOUT_MIN_COUNT or more missing items are generated per section, concurrently.
+    """
+    artifact = None if refresh else get_artifact(db, document_id, kind)
+    items = list(artifact.data) if artifact else []
+    if len(items) >= count:
+        return items[:count]
+
+    _require_ready(db, document_id)
+    existing = {_question_key(item) for item in items}
+    missing = count - len(items)
+    generate = _validated(generate, fallback, is_valid)
+    exclude_questions = [item.get("question", "") for item in items] or None
+    if missing >= FANOUT_MIN_COUNT:
+        generated = fan_out_generate(document_id, missing, generate, fallback, exclude_questions)
+    else:
+        generated = generate(document_id, missing, exclude_questions=exclude_questions)
+    if generated is fallback:
+        # Nothing new to store, serve what the set already has
+        return items or fallback
+
+    for item in generated:
+        _add_new(items, existing, item)
+
+    save_artifact(db, document_id, kind, items, len(items))
+    return items[:count]
+
+
+def _add_new(items: list, existing: set, item: dict) -> bool:
+    """Append item unless its question is already in the set"""
+    key = _question_key(item)
+    if not key or key in existing:
+        return False
+    existing.add(key)
+    items.append(item)
+    return True
+
+
+def _stream_set(
+    document_id: str,
+    kind: str,
+    count: int,
+    refresh: bool,
+    stream: Callable[..., Iterator[dict]]
+) -> Iterator[dict]:
+    """
+    Streaming variant of _get_or_generate_set: stored items first, then
+    each missing item as soon as the LLM completes it
+
+    Uses its own session, the response body outlives the request dependencies.
+    Whatever was generated is stored, also when the stream breaks off.
+    """
+    db = SessionLocal()
+    try:
+        artifact = None if refresh else get_artifact(db, document_id, kind)
+        items = list(artifact.data) if artifact else []
+        yield from items[:count]
+        if len(items) >= count:
+            return
+
+        _require_ready(db, document_id)
+        existing = {_question_key(item) for item in items}
+        added = 0
+        try:
+            generated = stream(
+                document_id,
+                count - len(items),
+                exclude_questions=[item.get("question", "") for item in items] or None
+            )
+            for item in generated:
+                if not _add_new(items, existing, item):
+                    continue
+                added += 1
+                yield item
+                if len(items) >= count:
+                    break
+        finally:
+            if added:
+                save_artifact(db, document_id, kind, items, len(items))
+    finally:
+        db.close()
+
+
+def get_or_generate_flashcards(db: Session, document_id: str, count: int, refresh: bool = False) -> list:
+    """Stored flashcards, missing ones generated (and stored), refresh regenerates the set"""
+    return _get_or_generate_set(
+        db, document_id, KIND_FLASHCARDS, count, refresh, generate_flashcards, FALLBACK_FLASHCARDS, is_valid_flashcard
+    )
+
+
+def get_or_generate_quiz(db: Session, document_id: str, count: int, refresh: bool = False) -> list:
+    """Stored quiz questions, missing ones generated (and stored), refresh regenerates the set"""
+    return _get_or_generate_set(
+        db, document_id, KIND_QUIZ, count, refresh, generate_quiz, FALLBACK_QUIZ, is_valid_question
+    )
+
+
+def stream_flashcard_set(document_id: str, count: int, refresh: bool = False) -> Iterator[dict]:
+    """Flashcards one by one, stored ones first, the missing ones streamed from the LLM"""
+    return _stream_set(document_id, KIND_FLASHCARDS, count, refresh, stream_flashcards)
+
+
+def stream_quiz_set(document_id: str, count: int, refresh: bool = False) -> Iterator[dict]:
+    """Quiz questions one by one, stored ones first, the missing ones streamed from the LLM"""
+    return _stream_set(document_id, KIND_QUIZ, count, refresh, stream_quiz)
+
+
+def get_or_generate_roadmap(db: Session, document_id: str, refresh: bool = False) -> dict:
+    """Stored document roadmap (no additional user input), generated on a miss"""
+    artifact = None if refresh else get_artifact(db, document_id, KIND_ROADMAP)
+    if artifact:
+        return artifact.data
+
+    _require_ready(db, document_id)
+    roadmap = generate_roadmap("", document_id)
+    save_artifact(db, document_id, KIND_ROADMAP, roadmap)
+    return roadmap
+
+
+def paginate(items: list, offset: int = 0, limit: int | None = None) -> tuple[list, str]:
+    """
+    Page of a stored set and its ETag
+
+    Returns:
+        (items[offset:offset + limit], strong ETag of the page content)
+    """
+    offset = max(offset, 0)
+    page = items[offset:] if limit is None else items[offset:offset + max(limit, 0)]
+    digest = hashlib.sha256(json.dumps(page, sort_keys=True).encode("utf-8")).hexdigest()
+    return page, f'"{digest[:32]}"'
+
+
+def pregenerate_study_artifacts(document_id: str):
+    """
+    Low priority background job after ingestion: default sized flashcards,
+    quiz and the document roadmap, so the study tab opens from stored results.
+    Each artifact is independent, one failing does not stop the others.
+    """
+    db = SessionLocal()
+    try:
+        steps = [
+            (KIND_FLASHCARDS, lambda: get_or_generate_flashcards(db, document_id, DEFAULT_FLASHCARD_COUNT)),
+            (KIND_QUIZ, lambda: get_or_generate_quiz(db, document_id, DEFAULT_QUIZ_COUNT)),
+            (KIND_ROADMAP, lambda: get_or_generate_roadmap(db, document_id)),
+        ]
+        for kind, generate in steps:
+            try:
+                generate()
+                print(f"Pre-generated {kind} for document {document_id}")
+            except Exception as e:
+                db.rollback()
+                print(f"Pre-generating {kind} failed for document {document_id}: {e}")
+    finally:
+        db.close()
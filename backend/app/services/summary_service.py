@@ -0,0 +1,141 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+from langchain_core.documents import Document as LCDocument
+from utils.pdf_utils import iter_pages
+from services.llm_gateway import llm_gateway
+from core.config import (
+    SUMMARY_DIR,
+    SUMMARY_LEAF_CHARS,
+    SUMMARY_SECTION_FANOUT,
+    SUMMARY_CONCURRENCY
+)
+
+LLM_PROFILE = "summary"
+
+
+def _summarize(text: str, scope: str) -> str:
+    prompt = f"""
+You are an educational assistant.
+Summarize the {scope} below for a student.
+Keep every key concept, definition, formula and topic name.
+Do NOT add information that is not in the text.
+Return concise bullet points.
+
+Text:
+{text}
+
+Summary:
+"""
+    return llm_gateway.complete(prompt, profile=LLM_PROFILE).strip()
+
+
+def _group_pages(pages: Iterable[LCDocument], max_chars: int) -> list[dict]:
+    """Consecutive pages packed into leaves of at most max_chars (a long page is a leaf on its own)"""
+    leaves = []
+    current, size = [], 0
+    for page in pages:
+        text = page.page_content.strip()
+        if not text:
+            continue
+        if current and size + len(text) > max_chars:
+            leaves.append(current)
+            current, size = [], 0
+        current.append(page)
+        size += len(text)
+    if current:
+        leaves.append(current)
+
+    return [
+        {
+            "pages": [leaf[0].metadata.get("page", 0), leaf[-1].metadata.get("page", 0)],
+            "text": "\n".join(p.page_content.strip() for p in leaf)[:max_chars]
+        }
+        for leaf in leaves
+    ]
+
+
+def build_summary_tree(collection_name: str, pages: Iterable[LCDocument]) -> dict:
+    """
+    Map-reduce summary of a document, stored next to its vector collection
+
+    - pages: consecutive pages summarized in leaves (map)
+    - sections: SUMMARY_SECTION_FANOUT page summaries reduced into one
+    - document: sections reduced level by level into a single summary
+
+    Returns:
+        {"pages": [...], "sections": [...], "document": "..."}
+    """
+    leaves = _group_pages(pages, SUMMARY_LEAF_CHARS)
+    if not leaves:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY) as pool:
+        page_summaries = list(pool.map(lambda leaf: _summarize(leaf["text"], "pages"), leaves))
+        page_nodes = [
+            {"pages": leaf["pages"], "summary": summary}
+            for leaf, summary in zip(leaves, page_summaries)
+        ]
+
+        sections = _reduce(pool, page_nodes, "section of a document")
+        level = sections
+        while len(level) > 1:
+            level = _reduce(pool, level, "part of a document")
+
+    tree = {
+        "pages": page_nodes,
+        "sections": sections,
+        "document": level[0]["summary"]
+    }
+    save_summary_tree(collection_name, tree)
+    return tree
+
+
+def _reduce(pool: ThreadPoolExecutor, nodes: list[dict], scope: str) -> list[dict]:
+    groups = [nodes[i:i + SUMMARY_SECTION_FANOUT] for i in range(0, len(nodes), SUMMARY_SECTION_FANOUT)]
+
+    def reduce_group(group):
+        if len(group) == 1:
+            return group[0]
+        summary = _summarize("\n\n".join(node["summary"] for node in group), scope)
+        return {"pages": [group[0]["pages"][0], group[-1]["pages"][1]], "summary": summary}
+
+    return list(pool.map(reduce_group, groups))
+
+
+def summary_path(collection_name: str) -> str:
+    return os.path.join(SUMMARY_DIR, f"{collection_name}.json")
+
+
+def save_summary_tree(collection_name: str, tree: dict):
+    os.makedirs(SUMMARY_DIR, exist_ok=True)
+    tmp_path = summary_path(collection_name) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(tree, f)
+    os.replace(tmp_path, summary_path(collection_name))
+
+
+def get_summary_tree(collection_name: str) -> dict | None:
+    """Stored summary tree, None while it is being built (or for old documents)"""
+    path = summary_path(collection_name)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def remove_summary_tree(collection_name: str):
+    if os.path.exists(summary_path(collection_name)):
+        os.remove(summary_path(collection_name))
+
+
+def summary_job(collection_name: str, file_path: str):
+    """Background job wrapper, a failed summary only means callers keep using chunks"""
+    try:
+        # Pages are streamed from the file, ingestion does not keep them in memory
+        build_summary_tree(collection_name, iter_pages(file_path))
+        print(f"Summary tree built for {collection_name}")
+    except Exception as e:
+        print(f"Summary tree failed for {collection_name}: {e}")
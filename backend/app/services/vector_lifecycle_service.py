@@ -0,0 +1,283 @@
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import or_, func
+from sqlalchemy.orm import Session
+from core.config import (
+    VECTOR_DB_DIR,
+    LEXICAL_INDEX_DIR,
+    SUMMARY_DIR,
+    KEY_CONCEPTS_DIR,
+    EMBEDDING_CACHE_PATH,
+    VECTOR_STORAGE_MODE,
+    SHARED_COLLECTION_PREFIX,
+    VECTOR_STORE_QUOTA_MB,
+    VECTOR_MAINTENANCE_INTERVAL_SECONDS
+)
+from core.database import SessionLocal
+from core.models import Document
+from services.document_service import STATUS_READY, STATUS_EVICTED
+from services.vector_store_service import vector_store, vector_writes, shard_name
+from services.lexical_index import lexical_indexes
+from services.summary_service import remove_summary_tree
+from services.answer_cache import answer_cache
+from services.key_concepts_service import remove_key_concepts
+
+CHROMA_SQLITE_FILE = "chroma.sqlite3"
+SEGMENT_DIR_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+_maintenance_thread: threading.Thread | None = None
+
+
+def _collection_of(document: Document) -> str:
+    return document.collection_name or str(document.document_id)
+
+
+def _is_referenced(db: Session, collection_name: str) -> bool:
+    """Any document row (owner or deduplicated upload) still using the collection"""
+    filters = [Document.collection_name == collection_name]
+    try:
+        filters.append(Document.document_id == UUID(collection_name))
+    except ValueError:
+        pass
+    return db.query(Document.document_id).filter(or_(*filters)).first() is not None
+
+
+def drop_collection_artifacts(collection_name: str, keep_summary: bool = False):
+    """Vectors, BM25 index, cached answers, key concepts (and summary tree) of a collection"""
+    vector_store.delete_document_store(collection_name)
+    lexical_indexes.remove(collection_name)
+    answer_cache.invalidate(collection_name)
+    remove_key_concepts(collection_name)
+    if not keep_summary:
+        remove_summary_tree(collection_name)
+
+
+def release_documents(db: Session, documents: list[Document]):
+    """
+    Clean up after document rows were deleted (e.g. by the chat cascade)
+
+    A collection, and the uploaded file, are only removed once no remaining
+    row references them, deduplicated uploads keep them alive.
+    """
+    for document in documents:
+        collection_name = _collection_of(document)
+        if not _is_referenced(db, collection_name):
+            drop_collection_artifacts(collection_name)
+            print(f"Deleted vector collection {collection_name}")
+
+        still_used = db.query(Document.document_id).filter(Document.file_path == document.file_path).first()
+        if not still_used and os.path.exists(document.file_path):
+            os.remove(document.file_path)
+
+
+def sweep_orphan_collections(db: Session) -> int:
+    """Delete collections without a document row (e.g. rows removed directly in the DB)"""
+    if VECTOR_STORAGE_MODE == "shared":
+        # Orphans inside shared collections are only removed through release_documents
+        return 0
+
+    removed = 0
+    for collection in vector_store.client.list_collections():
+        name = collection.name
+        if name.startswith(SHARED_COLLECTION_PREFIX) or _is_referenced(db, name):
+            continue
+        drop_collection_artifacts(name)
+        removed += 1
+    return removed
+
+
+def flush_access_times(db: Session):
+    """Persist last access times of collections, used to pick cold documents"""
+    for collection_name, accessed_at in vector_store.pop_access_times().items():
+        try:
+            document_uuid = UUID(collection_name)
+        except ValueError:
+            continue
+        db.query(Document).filter(Document.document_id == document_uuid).update(
+            {"last_accessed_at": datetime.utcfromtimestamp(accessed_at)}
+        )
+    db.commit()
+
+
+def enforce_quota(db: Session, quota_bytes: int) -> list[str]:
+    """
+    Evict the least recently used documents until the vector store fits the quota
+
+    Evicted documents keep their row, file and summary tree, their vectors
+    and BM25 index are dropped and rebuilt from file_path when asked again.
+    Per-document size is estimated from the chunks Chroma holds for it;
+    documents whose chunk count cannot be read are never evicted.
+
+    Returns:
+        Evicted collection names
+    """
+    usage = _directory_size(VECTOR_DB_DIR)
+    if usage <= quota_bytes:
+        return []
+
+    total_chunks = _total_chunks()
+    if not total_chunks:
+        return []
+    bytes_per_chunk = usage / total_chunks
+
+    owners = (
+        db.query(Document)
+        .filter((Document.status.is_(None)) | (Document.status == STATUS_READY))
+        .filter(Document.collection_name.is_(None))
+        # Rows from before access tracking count as last used when created
+        .order_by(func.coalesce(Document.last_accessed_at, Document.created_at).asc())
+        .all()
+    )
+
+    evicted = []
+    for document in owners:
+        if usage <= quota_bytes:
+            break
+        collection_name = _collection_of(document)
+        chunks = _chunk_count(collection_name)
+        if not chunks:
+            continue
+        drop_collection_artifacts(collection_name, keep_summary=True)
+        document.status = STATUS_EVICTED
+        db.commit()
+        usage -= chunks * bytes_per_chunk
+        evicted.append(collection_name)
+
+    print(f"Vector store quota: evicted {len(evicted)} cold documents")
+    return evicted
+
+
+def _chunk_count(collection_name: str) -> int | None:
+    """Chunks stored for a logical collection, None when Chroma cannot tell"""
+    try:
+        if VECTOR_STORAGE_MODE == "shared":
+            # Not through get_document_store, that would mark the document as accessed
+            stored = vector_store.get_collection(shard_name(collection_name)).get(
+                where={"document_id": collection_name}, include=[]
+            )
+            return len(stored["ids"])
+        return vector_store.client.get_collection(collection_name).count()
+    except Exception as e:
+        print(f"Could not count chunks of {collection_name}: {e}")
+        return None
+
+
+def _total_chunks() -> int:
+    total = 0
+    for collection in vector_store.client.list_collections():
+        try:
+            total += vector_store.client.get_collection(collection.name).count()
+        except Exception as e:
+            print(f"Could not count chunks of {collection.name}: {e}")
+    return total
+
+
+def compact() -> dict:
+    """
+    Reclaim disk space: remove segment directories no collection uses
+    and VACUUM Chroma's SQLite file (deleted rows are not given back otherwise)
+
+    Only runs while nothing writes to the store (skipped otherwise, the next
+    maintenance run tries again), writers wait until it is done.
+    """
+    before = _directory_size(VECTOR_DB_DIR)
+    sqlite_path = os.path.join(VECTOR_DB_DIR, CHROMA_SQLITE_FILE)
+    removed_segments = 0
+
+    if not vector_writes.try_exclusive():
+        print("Vector store compaction skipped: writes in progress")
+        return {"removed_segments": 0, "bytes_before": before, "bytes_after": before}
+
+    try:
+        if os.path.exists(sqlite_path):
+            conn = sqlite3.connect(sqlite_path, timeout=30)
+            try:
+                segment_ids = {row[0] for row in conn.execute("SELECT id FROM segments")}
+                for entry in os.listdir(VECTOR_DB_DIR):
+                    path = os.path.join(VECTOR_DB_DIR, entry)
+                    if os.path.isdir(path) and SEGMENT_DIR_PATTERN.match(entry) and entry not in segment_ids:
+                        shutil.rmtree(path, ignore_errors=True)
+                        removed_segments += 1
+                conn.execute("VACUUM")
+            except sqlite3.Error as e:
+                # Busy store, the next maintenance run tries again
+                print(f"Vector store compaction skipped: {e}")
+            finally:
+                conn.close()
+    finally:
+        vector_writes.release_exclusive()
+
+    after = _directory_size(VECTOR_DB_DIR)
+    return {"removed_segments": removed_segments, "bytes_before": before, "bytes_after": after}
+
+
+def disk_usage_report() -> dict:
+    """Bytes used by the vector store and the artifacts stored next to it"""
+    vector_db_bytes = _directory_size(VECTOR_DB_DIR)
+    sqlite_path = os.path.join(VECTOR_DB_DIR, CHROMA_SQLITE_FILE)
+    return {
+        "storage_mode": VECTOR_STORAGE_MODE,
+        "vector_db_bytes": vector_db_bytes,
+        "vector_db_sqlite_bytes": os.path.getsize(sqlite_path) if os.path.exists(sqlite_path) else 0,
+        "lexical_index_bytes": _directory_size(LEXICAL_INDEX_DIR),
+        "summary_bytes": _directory_size(SUMMARY_DIR),
+        "key_concepts_bytes": _directory_size(KEY_CONCEPTS_DIR),
+        "embedding_cache_bytes": (
+            os.path.getsize(EMBEDDING_CACHE_PATH)
+            if EMBEDDING_CACHE_PATH and os.path.exists(EMBEDDING_CACHE_PATH) else 0
+        ),
+        "collections": len(vector_store.client.list_collections()),
+        "quota_bytes": VECTOR_STORE_QUOTA_MB * 1024 * 1024 if VECTOR_STORE_QUOTA_MB else None
+    }
+
+
+def run_maintenance() -> dict:
+    """One maintenance pass: access times, orphans, quota, compaction"""
+    db = SessionLocal()
+    try:
+        flush_access_times(db)
+        orphans = sweep_orphan_collections(db)
+        evicted = (
+            enforce_quota(db, VECTOR_STORE_QUOTA_MB * 1024 * 1024)
+            if VECTOR_STORE_QUOTA_MB else []
+        )
+    finally:
+        db.close()
+
+    return {"orphans_removed": orphans, "evicted": evicted, **compact()}
+
+
+def start_maintenance(interval_seconds: int = VECTOR_MAINTENANCE_INTERVAL_SECONDS):
+    """Run maintenance periodically on a daemon thread (once per process)"""
+    global _maintenance_thread
+    if _maintenance_thread is not None or interval_seconds <= 0:
+        return
+
+    def loop():
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                print(f"Vector store maintenance: {run_maintenance()}")
+            except Exception as e:
+                print(f"Vector store maintenance failed: {e}")
+
+    _maintenance_thread = threading.Thread(target=loop, name="vector-maintenance", daemon=True)
+    _maintenance_thread.start()
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
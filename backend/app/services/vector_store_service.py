@@ -0,0 +1,245 @@
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import chromadb
+from langchain_chroma import Chroma
+from langchain_nomic import NomicEmbeddings
+from core.config import VECTOR_DB_DIR, EMBEDDING_MODEL, VECTOR_COLLECTION_CACHE_SIZE
+from core.config import SUMMARY_QUERY, CONCEPTS_QUERY, QUERY_EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_PATH
+from core.config import DOCUMENT_EMBEDDING_CACHE_SIZE, EMBEDDING_BATCH_SIZE
+from core.config import VECTOR_STORAGE_MODE, SHARED_COLLECTION_PREFIX, SHARED_COLLECTION_SHARDS
+from services.embedding_cache import EmbeddingCache, CachedEmbeddings
+
+
+class FilteredCollection:
+    """
+    One document's view of a shared Chroma collection.
+
+    Mirrors the parts of the Chroma vector store API the services use,
+    scoping every read to the document_id metadata and tagging every write.
+
+    Chunks are not tagged with a chat: deduplicated uploads share one
+    collection across chats, a chat's documents are resolved from the DB.
+    """
+
+    def __init__(self, vector_db: Chroma, collection_name: str):
+        self.vector_db = vector_db
+        self.collection_name = collection_name
+        self.filter = {"document_id": collection_name}
+
+    def add_documents(self, documents: list, ids: list[str] | None = None):
+        for doc in documents:
+            doc.metadata = {**doc.metadata, **self.filter}
+        return self.vector_db.add_documents(documents, ids=ids)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs):
+        return self.vector_db.similarity_search(query, k=k, filter=self.filter, **kwargs)
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs):
+        return self.vector_db.similarity_search_with_score(query, k=k, filter=self.filter, **kwargs)
+
+    def max_marginal_relevance_search(self, query: str, k: int = 4, fetch_k: int = 20, **kwargs):
+        return self.vector_db.max_marginal_relevance_search(
+            query, k=k, fetch_k=fetch_k, filter=self.filter, **kwargs
+        )
+
+    def get(self, **kwargs):
+        return self.vector_db.get(where=self.filter, **kwargs)
+
+    def delete(self, ids: list[str] | None = None):
+        """Delete the given chunks, or all chunks of the document"""
+        if ids:
+            return self.vector_db.delete(ids=ids)
+        return self.vector_db.delete(where=self.filter)
+
+
+class VectorWriteGate:
+    """
+    Writers of the vector store (ingestions, collection creation and deletion)
+    run side by side, compaction needs the store to itself: it rewrites
+    Chroma's SQLite file and removes segment directories no collection uses.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._writers = 0
+        self._exclusive = False
+
+    @contextmanager
+    def writing(self):
+        """Hold while writing, waits for a running compaction"""
+        with self._condition:
+            while self._exclusive:
+                self._condition.wait()
+            self._writers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writers -= 1
+                self._condition.notify_all()
+
+    def try_exclusive(self) -> bool:
+        """Take the store for compaction, False (nothing taken) while anything writes"""
+        with self._condition:
+            if self._exclusive or self._writers:
+                return False
+            self._exclusive = True
+            return True
+
+    def release_exclusive(self):
+        with self._condition:
+            self._exclusive = False
+            self._condition.notify_all()
+
+
+class VectorStoreService:
+    """
+    Process-wide vector store access for all RAG call sites.
+
+    Owns ONE embedding client and ONE persistent Chroma client,
+    and hands out collection handles from a bounded LRU cache.
+    Thread-safe: sync endpoints run in FastAPI's threadpool.
+    """
+
+    def __init__(
+        self,
+        persist_directory: str = VECTOR_DB_DIR,
+        embedding_model: str = EMBEDDING_MODEL,
+        max_collections: int = VECTOR_COLLECTION_CACHE_SIZE
+    ):
+        self.persist_directory = persist_directory
+        self.embedding_model = embedding_model
+        self.max_collections = max_collections
+
+        self._lock = threading.RLock()
+        self._embeddings: CachedEmbeddings | None = None
+        self._client = None
+        self._collections: "OrderedDict[str, Chroma]" = OrderedDict()
+        self._last_access: dict[str, float] = {}
+
+    @property
+    def embeddings(self) -> CachedEmbeddings:
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = CachedEmbeddings(
+                    NomicEmbeddings(model=self.embedding_model),
+                    model=self.embedding_model,
+                    cache=EmbeddingCache(
+                        max_entries=QUERY_EMBEDDING_CACHE_SIZE,
+                        disk_path=EMBEDDING_CACHE_PATH
+                    ),
+                    pinned_queries=[SUMMARY_QUERY, CONCEPTS_QUERY],
+                    document_cache=EmbeddingCache(
+                        max_entries=DOCUMENT_EMBEDDING_CACHE_SIZE,
+                        disk_path=EMBEDDING_CACHE_PATH
+                    ),
+                    batch_size=EMBEDDING_BATCH_SIZE
+                )
+            return self._embeddings
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = chromadb.PersistentClient(path=self.persist_directory)
+            return self._client
+
+    def get_collection(self, collection_name: str) -> Chroma:
+        """
+        Get a (cached) handle to a collection, creating it if needed
+
+        Args:
+            collection_name: Chroma collection name (the document ID)
+
+        Returns:
+            Chroma vector store bound to the shared clients
+        """
+        with self._lock:
+            vector_db = self._collections.get(collection_name)
+            if vector_db is not None:
+                self._collections.move_to_end(collection_name)
+                return vector_db
+
+            # Creates the collection (and its segments) when it does not exist yet
+            with vector_writes.writing():
+                vector_db = Chroma(
+                    collection_name=collection_name,
+                    embedding_function=self.embeddings,
+                    client=self.client,
+                )
+
+            self._collections[collection_name] = vector_db
+            if len(self._collections) > self.max_collections:
+                self._collections.popitem(last=False)
+
+            return vector_db
+
+    def get_document_store(self, collection_name: str):
+        """
+        Vector store of one logical collection (a document's chunks)
+
+        - "per_document" mode: a Chroma collection of its own
+        - "shared" mode: a metadata-filtered view of one of
+          SHARED_COLLECTION_SHARDS shared collections
+
+        Args:
+            collection_name: Logical collection name (the owning document ID)
+        """
+        self._last_access[collection_name] = time.time()
+
+        if VECTOR_STORAGE_MODE != "shared":
+            return self.get_collection(collection_name)
+        return FilteredCollection(
+            self.get_collection(shard_name(collection_name)),
+            collection_name
+        )
+
+    def delete_document_store(self, collection_name: str):
+        """Delete all vectors of a logical collection"""
+        if VECTOR_STORAGE_MODE == "shared":
+            document_store = self.get_document_store(collection_name)
+            with vector_writes.writing():
+                document_store.delete()
+        else:
+            try:
+                with vector_writes.writing():
+                    self.client.delete_collection(collection_name)
+            except Exception as e:
+                # Already gone (or never created, e.g. ingestion failed early)
+                print(f"Could not delete collection {collection_name}: {e}")
+        self.forget_collection(collection_name)
+        self._last_access.pop(collection_name, None)
+
+    def pop_access_times(self) -> dict[str, float]:
+        """Last access time per logical collection since the previous call"""
+        with self._lock:
+            access_times, self._last_access = self._last_access, {}
+            return access_times
+
+    def forget_collection(self, collection_name: str):
+        """Drop a cached handle, e.g. after the collection was deleted"""
+        with self._lock:
+            self._collections.pop(collection_name, None)
+
+    def warm_up(self):
+        """Create the clients and pin the constant query embeddings at startup"""
+        self.client.heartbeat()
+        try:
+            self.embeddings.warm_up()
+        except Exception as e:
+            # Not fatal, constant queries are embedded on first use instead
+            print(f"Embedding warm-up failed: {e}")
+
+
+def shard_name(collection_name: str) -> str:
+    """Shared collection holding a logical collection, stable across processes"""
+    shard = zlib.crc32(collection_name.encode("utf-8")) % SHARED_COLLECTION_SHARDS
+    return f"{SHARED_COLLECTION_PREFIX}{shard}"
+
+
+vector_writes = VectorWriteGate()
+vector_store = VectorStoreService()
@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document as LCDocument
+from core.config import CHUNK_OVERLAP
+from services.context_packer import merge_adjacent
+
+
+def _chunk(text: str, **metadata) -> LCDocument:
+    return LCDocument(page_content=text, metadata={"document_id": "doc", "source": "notes.pdf", "page": 1, **metadata})
+
+
+def test_chunks_without_offsets_and_real_overlap_stay_apart():
+    blocks = merge_adjacent([
+        _chunk("Photosynthesis happens in the chloroplast"),
+        _chunk("thylakoid membranes hold chlorophyll")
+    ])
+
+    assert [block["text"] for block in blocks] == [
+        "Photosynthesis happens in the chloroplast",
+        "thylakoid membranes hold chlorophyll"
+    ]
+
+
+def test_chunks_without_offsets_share_splitter_overlap_once():
+    shared = " ".join(["light reactions split water and release oxygen"] * 4)
+    assert len(shared) >= CHUNK_OVERLAP // 2
+
+    blocks = merge_adjacent([
+        _chunk(f"Photosynthesis has two stages. {shared}"),
+        _chunk(f"{shared} The Calvin cycle fixes carbon.")
+    ])
+
+    assert [block["text"] for block in blocks] == [
+        f"Photosynthesis has two stages. {shared} The Calvin cycle fixes carbon."
+    ]
+
+
+def test_chunks_with_offsets_merge_on_their_ranges():
+    blocks = merge_adjacent([
+        _chunk("cycle fixes carbon", start_index=11),
+        _chunk("The Calvin cycle", start_index=0)
+    ])
+
+    assert [block["text"] for block in blocks] == ["The Calvin cycle fixes carbon"]
+    assert blocks[0]["rank"] == 0
@@ -1,7 +1,10 @@
+import hashlib
 import os
 import uuid
 from fastapi import UploadFile
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 def find_sadtaker_video(folder:str):
     for file in os.listdir(folder):
         if file.endswith(".mp4"):
@@ -10,12 +13,20 @@ def find_sadtaker_video(folder:str):
     return None
 
 def save_file(upload_file: UploadFile, base_dir: str)->str:
+    file_path, _ = save_file_with_hash(upload_file, base_dir)
+    return file_path
+
+def save_file_with_hash(upload_file: UploadFile, base_dir: str)->tuple[str, str]:
+    """Stream the upload to disk in chunks, returns (file_path, sha256 hex digest)"""
     os.makedirs(base_dir,exist_ok=True)
     ext = os.path.splitext(upload_file.filename)[1]
-    unique_name = f"{uuid.uuid4()}ext"
+    unique_name = f"{uuid.uuid4()}{ext}"
     file_path = os.path.join(base_dir,unique_name)
 
+    sha256 = hashlib.sha256()
     with open(file_path,"wb") as f:
-        f.write(upload_file.file.read())
+        for chunk in iter(lambda: upload_file.file.read(UPLOAD_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            f.write(chunk)
 
-    return file_path
\ No newline at end of file
+    return file_path, sha256.hexdigest()
\ No newline at end of file
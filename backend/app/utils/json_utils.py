@@ -1,5 +1,6 @@
 import json
 import re
+from typing import Iterable, Iterator
 
 def extract_json(text: str) -> dict:
     """
@@ -12,3 +13,66 @@ def extract_json(text: str) -> dict:
         if not match:
             raise ValueError("No JSON object found in LLM output")
         return json.loads(match.group())
+
+
+class JsonObjectStreamParser:
+    """
+    Incremental parser for a streamed JSON array of objects (LLM token stream)
+
+    Text is fed as it arrives; every top-level object is parsed as soon as its
+    closing brace is seen. Objects that fail to parse are skipped, so a
+    malformed or truncated tail does not lose the items before it. Text
+    around the objects (code fences, the array brackets) is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.skipped = 0
+
+    def feed(self, text: str) -> list[dict]:
+        objects = []
+        for char in text:
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._buffer = [char]
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    parsed = self._parse("".join(self._buffer))
+                    self._buffer = []
+                    if parsed is not None:
+                        objects.append(parsed)
+        return objects
+
+    def _parse(self, text: str) -> dict | None:
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            self.skipped += 1
+            return None
+        return parsed if isinstance(parsed, dict) else None
+
+
+def iter_json_objects(chunks: Iterable[str]) -> Iterator[dict]:
+    """Yield each complete top-level JSON object of a streamed array as soon as it closes"""
+    parser = JsonObjectStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
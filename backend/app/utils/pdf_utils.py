@@ -0,0 +1,63 @@
+from concurrent.futures import Executor
+from typing import Iterator
+
+from langchain_core.documents import Document as LCDocument
+from pypdf import PdfReader
+
+
+def count_pages(file_path: str) -> int:
+    # Only the page tree is read, page contents are parsed lazily
+    return len(PdfReader(file_path).pages)
+
+
+def extract_page_range(file_path: str, start: int, end: int) -> list[str]:
+    """Texts of pages [start, end), picklable so it can run in a worker process"""
+    reader = PdfReader(file_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def iter_page_batches(
+    file_path: str,
+    start_page: int = 0,
+    batch_pages: int = 32,
+    executor: Executor | None = None,
+    pages_per_task: int = 8
+) -> Iterator[list[LCDocument]]:
+    """
+    Yield the pages of a PDF lazily, batch_pages at a time and in page order
+
+    Only one batch is held in memory. With an executor, the page ranges
+    of a batch are extracted in parallel.
+    """
+    pages_total = count_pages(file_path)
+
+    for batch_start in range(start_page, pages_total, batch_pages):
+        batch_end = min(batch_start + batch_pages, pages_total)
+        ranges = [
+            (start, min(start + pages_per_task, batch_end))
+            for start in range(batch_start, batch_end, pages_per_task)
+        ]
+
+        if executor:
+            texts = executor.map(
+                extract_page_range,
+                [file_path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges]
+            )
+        else:
+            texts = (extract_page_range(file_path, s, e) for s, e in ranges)
+
+        pages = []
+        for (start, _), range_texts in zip(ranges, texts):
+            for offset, text in enumerate(range_texts):
+                pages.append(LCDocument(
+                    page_content=text,
+                    metadata={"source": file_path, "page": start + offset}
+                ))
+        yield pages
+
+
+def iter_pages(file_path: str, batch_pages: int = 32) -> Iterator[LCDocument]:
+    for batch in iter_page_batches(file_path, batch_pages=batch_pages):
+        yield from batch
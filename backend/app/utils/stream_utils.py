@@ -0,0 +1,48 @@
+import json
+from typing import Iterable, Iterator
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+STREAM_FORMATS = ("ndjson", "sse")
+
+
+def _item_events(items: Iterable[dict]) -> Iterator[dict]:
+    """item events, then done (or error when the generator fails halfway)"""
+    total = 0
+    try:
+        for item in items:
+            yield {"type": "item", "index": total, "item": item}
+            total += 1
+    except Exception as e:
+        print(f"Item stream failed after {total} items: {e}")
+        yield {"type": "error", "detail": "Generation failed", "total": total}
+        return
+    yield {"type": "done", "total": total}
+
+
+def stream_items_response(items: Iterable[dict], stream_format: str = "ndjson") -> StreamingResponse:
+    """
+    Stream generated items as they arrive
+
+    - ndjson: one JSON event per line
+    - sse: Server-Sent Events, the event name is the event type
+    """
+    if stream_format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(STREAM_FORMATS)}")
+
+    if stream_format == "sse":
+        body = (f"event: {event['type']}\ndata: {json.dumps(event)}\n\n" for event in _item_events(items))
+        media_type = "text/event-stream"
+    else:
+        body = (json.dumps(event) + "\n" for event in _item_events(items))
+        media_type = "application/x-ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
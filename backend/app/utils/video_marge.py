@@ -1,31 +1,67 @@
 import subprocess
 
-def merge_side_by_side(
-    left_video: str,
-    right_video: str,
-    output_video: str
+# Layout presets, input 0 is the lesson (Manim) video, input 1 the SadTalker avatar
+LAYOUTS = {
+    # Left -> Manim animation, Right -> SadTalker avatar
+    "side_by_side": (
+        "[0:v]scale=-2:{height}[left];"
+        "[1:v]scale=-2:{height}[right];"
+        "[left][right]hstack=inputs=2,scale=trunc(iw/2)*2:trunc(ih/2)*2[v]"
+    ),
+    # Manim full frame, avatar in the bottom right corner
+    "pip": (
+        "[0:v]scale=-2:{height}[main];"
+        "[1:v]scale=-2:{pip_height}[avatar];"
+        "[main][avatar]overlay=W-w-16:H-h-16,scale=trunc(iw/2)*2:trunc(ih/2)*2[v]"
+    ),
+}
+
+
+def composite_videos(
+    main_video: str,
+    avatar_video: str,
+    output_video: str,
+    layout: str = "side_by_side",
+    height: int = 720,
+    preset: str = "fast",
+    threads: int = 0
 ):
     """
-    Side-by-side merge:
-    Left  -> Manim animation
-    Right -> SadTalker avatar
+    Composite an already encoded Manim video and SadTalker video.
+
+    Only the video is re-encoded, the avatar's audio stream is copied.
+    Prefer compositing inside the SadTalker job (run_sadtalker(main_video=...)),
+    which encodes the avatar only once.
     """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {layout}")
 
     cmd = [
         "ffmpeg", "-y",
-        "-i", left_video,
-        "-i", right_video,
+        "-i", main_video,
+        "-i", avatar_video,
         "-filter_complex",
-        # Normalize height, then stack horizontally
-        "[0:v]scale=-1:720[left];"
-        "[1:v]scale=-1:720[right];"
-        "[left][right]hstack=inputs=2[v]",
+        LAYOUTS[layout].format(height=height, pip_height=height // 3),
         "-map", "[v]",
         "-map", "1:a?",   # Use SadTalker audio
         "-c:v", "libx264",
-        "-c:a", "aac",
-        "-preset", "fast",
+        "-c:a", "copy",
+        "-preset", preset,
+        "-threads", str(threads),
         output_video
     ]
 
     subprocess.run(cmd, check=True)
+
+
+def merge_side_by_side(
+    left_video: str,
+    right_video: str,
+    output_video: str
+):
+    """
+    Side-by-side merge:
+    Left  -> Manim animation
+    Right -> SadTalker avatar
+    """
+    composite_videos(left_video, right_video, output_video, layout="side_by_side")
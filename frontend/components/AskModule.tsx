@@ -1,6 +1,7 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { Bot, User, Loader2, Paperclip, X, FileText, Send, Mic, Video, FileQuestion, Layers, Check, ChevronRight, ChevronLeft, RefreshCw, CornerDownLeft, Plus, Play, MessageSquare, Clapperboard, Volume2, Menu, Trash2 } from 'lucide-react';
 import { ChatMessage, Attachment, QuizData, FlashcardData } from '../types';
+import { waitForDocumentReady } from '../services/documentService';
 
 type ToolMode = 'TEXT' | 'VIDEO' | 'QUIZ' | 'FLASHCARDS';
 type VideoSubMode = 'TALK' | 'MOVE';
@@ -402,10 +403,13 @@ const AskModule: React.FC = () => {
       }
 
       const data = await response.json();
+      await loadChatMessages(activeChat!);
+
+      if (data.status !== 'ready') {
+        await waitForDocumentReady(data.document_id);
+      }
       setDocumentId(data.document_id);
       setDocumentName(file.name);
-
-      await loadChatMessages(activeChat!);
     } catch (err) {
       console.error(err);
       alert('Failed to upload document');
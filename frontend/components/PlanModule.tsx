@@ -2,6 +2,7 @@ import React, { useState, useRef, useCallback, useEffect } from 'react';
 import { ReactFlow, Background, Controls, MiniMap, Node, Edge, useNodesState, useEdgesState, Connection, addEdge, BackgroundVariant, MarkerType, useReactFlow, ReactFlowProvider, Handle, Position } from '@xyflow/react';
 import { Send, Mic, Loader2, X, FileText, Upload, Bot, Clock, Trash2, ChevronRight, ChevronLeft, Plus, RotateCcw } from 'lucide-react';
 import { Attachment } from '../types';
+import { waitForDocumentReady } from '../services/documentService';
 import dagre from 'dagre';
 
 // Types
@@ -287,6 +288,14 @@ const PlanModuleContent: React.FC = () => {
         
         if (response.ok) {
           const data = await response.json();
+          if (data.status !== 'ready') {
+            setLoadingMessage('PROCESSING DOCUMENT...');
+            await waitForDocumentReady(data.document_id, status => {
+              if (status.pages_total) {
+                setLoadingMessage(`PROCESSING DOCUMENT... ${status.pages_parsed}/${status.pages_total} PAGES`);
+              }
+            });
+          }
           setDocumentId(data.document_id);
           
           const reader = new FileReader();
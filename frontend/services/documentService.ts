@@ -0,0 +1,40 @@
+const API_BASE = 'http://127.0.0.1:8000';
+
+const POLL_INTERVAL_MS = 2000;
+const MAX_WAIT_MS = 10 * 60 * 1000;
+
+export interface IngestionStatus {
+  document_id: string;
+  status: 'pending' | 'processing' | 'ready' | 'failed' | 'evicted';
+  pages_total: number | null;
+  pages_parsed: number;
+  chunks_embedded: number;
+  error: string | null;
+}
+
+// Uploads are ingested in the background, documents can only be queried once they are ready
+export const waitForDocumentReady = async (
+  documentId: string,
+  onProgress?: (status: IngestionStatus) => void
+): Promise<IngestionStatus> => {
+  const deadline = Date.now() + MAX_WAIT_MS;
+
+  while (Date.now() < deadline) {
+    const response = await fetch(`${API_BASE}/qa/documents/${documentId}/status`);
+    if (!response.ok) {
+      throw new Error(`Status check failed: ${response.status}`);
+    }
+
+    const status: IngestionStatus = await response.json();
+    onProgress?.(status);
+
+    if (status.status === 'ready') return status;
+    if (status.status === 'failed') {
+      throw new Error(status.error || 'Document processing failed');
+    }
+
+    await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+  }
+
+  throw new Error('Document processing timeout');
+};